@@ -2,5 +2,12 @@ from scheduler.instructor import Instructor
 from scheduler.timeslot import Timeslot
 from scheduler.room import Room
 from scheduler.timetable import Timetable
+from scheduler.options import SearchOptions
+from scheduler.schedule import Schedule
 from scheduler.assignment import Assignment
-from scheduler.exceptions import ImpossibleAssignments
\ No newline at end of file
+from scheduler.exceptions import ImpossibleAssignments
+from scheduler.propagation import Propagator
+from scheduler.stats import SearchObserver, PrintingObserver
+from scheduler.repair import ScheduleChange
+from scheduler.loaders import load_json, load_csv
+from scheduler.cache import SolutionCache
@@ -1,68 +1,61 @@
+from scheduler.registry import InternedValue
 
-class Assignment():
+
+class Assignment(InternedValue):
     """
     A label comprising a timeslot, a room and an instructor that can
     be assigned to a a lecture node.
     """
+    __slots__ = ('_instructor', '_room', '_timeslot')
+
     def __init__(self, instructor, room, timeslot):
         """
         Constructor
         """
-        self._instructor = instructor
-        self._room = room
-        self._timeslot = timeslot
+        self._set('_instructor', instructor)
+        self._set('_room', room)
+        self._set('_timeslot', timeslot)
+        super().__init__()
+
+    @property
+    def _key(self):
+        # Not stored, since there can be millions of assignments.
+        return (self._instructor, self._room, self._timeslot)
 
     @property        
     def room(self):
-        return self._room    
+        return self._room
     
     @property        
     def instructor(self):
-        return self._instructor  
+        return self._instructor
     
     @property        
     def timeslot(self):
-        return self._timeslot  
+        return self._timeslot
         
     def satisfies_constraints(self, lecture):
         """
         Check whether the assignment can be used for the lecture.
         """
-        satisfies = (self._instructor.can_teach(lecture) and 
-                    self._room.can_be_used_for(lecture))
-        return satisfies
+        return self._instructor.can_teach(lecture) and self._room.can_be_used_for(lecture)
     
     def overlaps_instructor_at_time(self, other):
         """
         Check whether another assignment uses the same instructor at the same time.
         """
-        return self._instructor == other._instructor and self._timeslot == other._timeslot 
+        return self.instructor == other.instructor and self.timeslot == other.timeslot
     
     def overlaps_room_at_time(self, other):
         """
         Check whether another assignment uses the same room at the same time.
         """
-        return self._room == other._room and self._timeslot == other._timeslot 
-    
-    def __eq__(self, other):
-        
-        if not isinstance(other, Assignment):
-            return False
-        return (self._instructor == other._instructor and
-                self._room == other._room and
-                self._timeslot == other._timeslot)
-        
-    def __hash__(self):
-        """Implement hash so objects can be used in sets."""
-        return hash(hash(self._instructor) + hash(self._room) + hash(self._timeslot))
+        return self.room == other.room and self.timeslot == other.timeslot
         
     def __repr__(self):
         
-        return '<Assignment: {}, {}, {}>'.format(
-            self._instructor, self._room, self._timeslot)
+        return '<Assignment: {}, {}, {}>'.format(*self._key)
     
     def __str__(self):
         
-        return 'Assignment: {}, {}, {}'.format(
-            self._instructor, self._room, self._timeslot)    
-        
\ No newline at end of file
+        return 'Assignment: {}, {}, {}'.format(*self._key)
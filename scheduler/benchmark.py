@@ -0,0 +1,178 @@
+"""
+Benchmark the scheduler on generated instances of increasing size.
+
+Run the benchmark and save the results:
+
+    python -m scheduler.benchmark --sizes 20 50 100 --output results.json
+
+Compare the results of two versions:
+
+    python -m scheduler.benchmark --compare old.json new.json
+"""
+from scheduler.generator import generate_instance
+from scheduler.timetable import Timetable
+from scheduler.options import SearchOptions
+from scheduler.exceptions import ImpossibleAssignments
+from scheduler import budget
+import argparse
+import datetime
+import json
+import math
+import multiprocessing
+import os
+import platform
+import subprocess
+import time
+
+
+def benchmark_instances(sizes, repeat=1, structured=False, seed=0):
+    """
+    Get the name and the arguments of generate_instance of repeat instances
+    per number of lectures. The other sizes grow with the lectures.
+    """
+    instances = []
+    for size in sizes:
+        for i in range(repeat):
+            instance_seed = seed + i
+            parameters = dict(n_lectures=size, n_instructors=max(2, size // 4),
+                              n_rooms=max(3, size // 6),
+                              n_timeslots=min(30, max(10, size // 4)),
+                              qualification_density=min(1, 5 / max(2, size // 4)),
+                              seed=instance_seed)
+            if structured:
+                parameters['n_groups'] = max(1, size // 25)
+            name = '%s-%d-%d' % ('structured' if structured else 'random',
+                                 size, instance_seed)
+            instances.append(dict(name=name, parameters=parameters))
+    return instances
+
+
+def run_benchmark(instances, options=None, jobs=1, model='product'):
+    """
+    Solve every instance in a fresh process, so that the peak memory belongs
+    to that instance alone.
+
+    Args:
+        instances (list): As returned by benchmark_instances.
+        options (dict): The budget of Timetable.find_schedule and the
+            arguments of SearchOptions, e.g. a timeout and a method.
+        jobs (int): The number of instances solved at the same time.
+        model (str): The model of the Timetable.
+
+    Returns:
+        A list of dictionaries with the results of each instance.
+    """
+    tasks = [dict(instance, options=options or {}, model=model) for instance in instances]
+    with multiprocessing.get_context().Pool(jobs, maxtasksperchild=1) as pool:
+        return pool.map(_run_instance, tasks, chunksize=1)
+
+
+def _run_instance(task):
+    """Solve one instance and measure it."""
+    spec = generate_instance(**task['parameters'])
+    search = dict(task['options'])
+    limits = {name: search.pop(name) for name in ('timeout', 'node_limit', 'memory_limit')
+              if name in search}
+    start = time.perf_counter()
+    timetable = Timetable(*spec, model=task['model'])
+    compiled = time.perf_counter()
+    try:
+        timetable.find_schedule(SearchOptions(**search), **limits)
+    except ImpossibleAssignments:
+        pass
+    solved = time.perf_counter()
+    return dict(name=task['name'], parameters=task['parameters'],
+                options=task['options'], model=task['model'], stop_reason=timetable.stop_reason,
+                n_assigned=len(timetable._schedule),
+                compile_time=compiled - start, solve_time=solved - compiled,
+                peak_memory=budget.peak_memory() if budget.resource else None,
+                stats=timetable.stats.as_dict())
+
+
+def save_results(results, path, arguments=None):
+    """Save results together with the version and the platform."""
+    report = dict(created=datetime.datetime.now().isoformat(timespec='seconds'),
+                  revision=_get_revision(), python=platform.python_version(),
+                  platform=platform.platform(), arguments=arguments,
+                  results=results)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def compare_results(old_path, new_path):
+    """
+    Get a table of the solve times and nodes of two saved benchmarks, and
+    the geometric mean of the speedup over the instances both have solved.
+    """
+    with open(old_path) as f:
+        old = {result['name']: result for result in json.load(f)['results']}
+    with open(new_path) as f:
+        new = {result['name']: result for result in json.load(f)['results']}
+
+    lines = ['{:<24} {:>10} {:>10} {:>8} {:>10} {:>10}'.format(
+        'Instance', 'Old time', 'New time', 'Speedup', 'Old nodes', 'New nodes')]
+    log_speedups = []
+    for name in old:
+        if name not in new:
+            continue
+        before, after = old[name], new[name]
+        speedup = before['solve_time'] / max(after['solve_time'], 1e-9)
+        if before['stop_reason'] == after['stop_reason'] in ('solved', 'infeasible'):
+            log_speedups.append(math.log(speedup))
+        lines.append('{:<24} {:>10.3f} {:>10.3f} {:>8.2f} {:>10} {:>10}'.format(
+            name, before['solve_time'], after['solve_time'], speedup,
+            before['stats']['n_nodes'], after['stats']['n_nodes']))
+    if log_speedups:
+        lines.append('Geometric mean speedup over {} finished instances: {:.2f}'.format(
+            len(log_speedups), math.exp(sum(log_speedups) / len(log_speedups))))
+    return '\n'.join(lines)
+
+
+def _get_revision():
+    """Get the git commit of the scheduler if it is checked out."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 20, 50, 100],
+                        help='numbers of lectures of the instances')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='instances per size')
+    parser.add_argument('--structured', action='store_true',
+                        help='split the instances into departments')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=60,
+                        help='seconds per instance')
+    parser.add_argument('--method', default='backtracking',
+                        choices=['backtracking', 'local'])
+    parser.add_argument('--model', default='product',
+                        choices=['product', 'factorized'])
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='instances solved at the same time')
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='compare two saved benchmarks instead')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        print(compare_results(*args.compare))
+        return
+    instances = benchmark_instances(args.sizes, args.repeat, args.structured, args.seed)
+    options = dict(timeout=args.timeout, method=args.method)
+    results = run_benchmark(instances, options, args.jobs, args.model)
+    for result in results:
+        print('{:<24} {:<12} {:>8.3f}s {:>10} nodes {:>8} MB'.format(
+            result['name'], result['stop_reason'], result['solve_time'],
+            result['stats']['n_nodes'],
+            '?' if result['peak_memory'] is None else '%.0f' % result['peak_memory']))
+    save_results(results, args.output, vars(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Limits on the resources a search may use.
+"""
+import sys
+import time
+try:
+    import resource
+except ImportError:
+    # Not available on Windows.
+    resource = None
+
+
+class SearchBudget():
+    """
+    Stops a search once it has run too long, visited too many nodes or the
+    process uses too much memory. The peak memory takes a system call, so it
+    is only checked at the first node and then every few nodes.
+    """
+    MEMORY_CHECK_INTERVAL = 64
+
+    def __init__(self, timeout=None, node_limit=None, memory_limit=None,
+                 should_stop=None):
+        """
+        Constructor
+
+        Args:
+            timeout (float): Seconds from now until the search is stopped.
+            node_limit (int): The number of nodes the search may visit.
+            memory_limit (float): Megabytes of peak memory of the process.
+            should_stop (callable): Stops the search once it returns True.
+
+        Raises:
+            ValueError: If memory cannot be measured on this platform.
+        """
+        if memory_limit is not None and resource is None:
+            raise ValueError('Memory limits are not supported on this platform.')
+        self._deadline = None if timeout is None else time.monotonic() + timeout
+        self._node_limit = node_limit
+        self._memory_limit = memory_limit
+        self._should_stop = should_stop
+        self.n_nodes = 0
+
+    def exhausted(self):
+        """Count a node and get the reason to stop, if any."""
+        self.n_nodes += 1
+        if self._node_limit is not None and self.n_nodes > self._node_limit:
+            return 'node_limit'
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            return 'timeout'
+        if (self._memory_limit is not None and
+            (self.n_nodes - 1) % self.MEMORY_CHECK_INTERVAL == 0 and
+            peak_memory() > self._memory_limit):
+            return 'memory_limit'
+        if self._should_stop is not None and self._should_stop():
+            return 'stopped'
+        return None
+
+
+def peak_memory():
+    """Get the peak resident set size of the process in megabytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    if sys.platform == 'darwin':
+        return peak / 2**20
+    return peak / 2**10
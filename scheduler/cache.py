@@ -0,0 +1,88 @@
+"""
+Content-addressed cache of solved schedules on disk.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+
+def spec_hash(timetable):
+    """Get a hash of the canonical specification of a timetable."""
+    spec = json.dumps(timetable.canonical_spec(), sort_keys=True, separators=(',', ':'),
+                      ensure_ascii=False)
+    return hashlib.sha256(spec.encode('utf-8')).hexdigest()
+
+
+class SolutionCache():
+    """
+    Complete schedules of solved timetables, one JSON file per specification
+    hash in a directory. A cached schedule is only used after check_schedule
+    has confirmed it, so a broken file leads to a new search.
+    """
+    def __init__(self, directory):
+        """
+        Constructor
+
+        Args:
+            directory (str): Where the schedules are stored. It is created
+                if it does not exist.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def find_schedule(self, timetable, **arguments):
+        """
+        Get the cached schedule of a timetable, or search one with the arguments
+        of find_schedule and cache it. Either way it is stored in the timetable.
+
+        Raises:
+            ImpossibleAssignments: If no schedule exists.
+        """
+        key = spec_hash(timetable)
+        schedule = self.load(timetable, key)
+        if schedule is not None:
+            return timetable._use_schedule(schedule)
+        schedule = timetable.find_schedule(**arguments)
+        if timetable.stop_reason == 'solved':
+            self.store(timetable, key)
+        return schedule
+
+    def load(self, timetable, key=None):
+        """
+        Get the cached schedule of a timetable if there is a valid one,
+        otherwise None.
+        """
+        path = self._path(key or spec_hash(timetable))
+        try:
+            with open(path, encoding='utf-8') as file:
+                rows = json.load(file)['schedule']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        try:
+            schedule = timetable._decode_rows(rows)
+        except (ValueError, TypeError):
+            # Rows that are not quadruples.
+            return None
+        if schedule is None or not timetable.check_schedule(schedule):
+            return None
+        return schedule
+
+    def store(self, timetable, key=None):
+        """Cache the complete schedule of a timetable."""
+        if timetable.stop_reason != 'solved':
+            raise ValueError('Only complete schedules can be cached.')
+        path = self._path(key or spec_hash(timetable))
+        # Written to a temporary file first, so that readers never see a
+        # partial file.
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+                json.dump({'schedule': timetable._encode_rows()}, file, ensure_ascii=False)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
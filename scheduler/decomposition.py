@@ -0,0 +1,101 @@
+"""
+Independent sub-problems of a timetable.
+"""
+import time
+
+
+# Set in worker processes once another component turned out infeasible.
+_stop = None
+
+
+def find_components(n_lectures, groups):
+    """
+    Split the lectures into the connected components of the graph in which
+    lectures are adjacent if they share a group, e.g. from resource_groups
+    of a compiled model. The components are ordered by their first lecture.
+    """
+    parents = list(range(n_lectures))
+
+    def find(lecture):
+        root = lecture
+        while parents[root] != root:
+            root = parents[root]
+        # Compress the path so that later lookups take constant time.
+        while parents[lecture] != root:
+            parents[lecture], lecture = root, parents[lecture]
+        return root
+
+    for lectures in groups:
+        if not lectures:
+            continue
+        root = find(lectures[0])
+        for lecture in lectures[1:]:
+            other = find(lecture)
+            if other != root:
+                parents[other] = root
+    components = {}
+    for lecture in range(n_lectures):
+        components.setdefault(find(lecture), []).append(lecture)
+    return list(components.values())
+
+
+def solve_components(timetables, options, budget):
+    """
+    Schedule the timetables of the components one after the other, or in a
+    pool of options.workers processes, until one has no schedule.
+
+    Args:
+        options (SearchOptions): How to search each component.
+        budget (dict): The timeout, node limit and memory limit, where the
+            timeout holds for all components together.
+
+    Returns:
+        The position, stop reason, assigned values like Timetable._solve and
+        stats of every component that has been searched.
+    """
+    budget = dict(budget)
+    timeout = budget.pop('timeout', None)
+    deadline = None if timeout is None else time.time() + timeout
+    results = []
+    if options.workers is None:
+        for position, timetable in enumerate(timetables):
+            result = _solve_component(position, timetable, options, budget, deadline)
+            results.append(result)
+            if result[1] == 'infeasible':
+                break
+        return results
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    import multiprocessing
+    context = multiprocessing.get_context()
+    stop = context.Event()
+    with ProcessPoolExecutor(options.workers, mp_context=context, initializer=_init_worker,
+                             initargs=(stop,)) as executor:
+        futures = [executor.submit(_solve_component, position, timetable, options, budget,
+                                   deadline)
+                   for position, timetable in enumerate(timetables)]
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if result[1] == 'infeasible':
+                    break
+        finally:
+            stop.set()
+            for future in futures:
+                future.cancel()
+    return results
+
+
+def _init_worker(stop):
+    global _stop
+    _stop = stop
+
+
+def _solve_component(position, timetable, options, budget, deadline):
+    """Search the schedule of a component, possibly in a worker process."""
+    if _stop is not None:
+        timetable._should_stop = _stop.is_set
+    timeout = None if deadline is None else max(deadline - time.time(), 0)
+    reason, assigned = timetable._solve(options, timeout=timeout, **budget)
+    return position, reason, assigned, timetable.stats
@@ -1,4 +1,21 @@
 """Custom exeptions."""
 class ImpossibleAssignments(ValueError):
-    
-    pass
+    """
+    Raised if the constraints cannot be satisfied. The lectures whose
+    domain became empty are stored if they are known, and so is the conflict,
+    the bitset of decision levels that caused the failure.
+    """
+    def __init__(self, message='', lectures=(), conflict=None):
+        super().__init__(message)
+        self.lectures = lectures
+        self.conflict = conflict
+
+
+class SearchLimitReached(Exception):
+    """
+    Raised if the search is stopped before it could finish. The reason is 
+    stored as a short identifier like 'timeout'.
+    """
+    def __init__(self, message='', reason=None):
+        super().__init__(message)
+        self.reason = reason
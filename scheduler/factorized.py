@@ -0,0 +1,408 @@
+"""
+Factorized model with separate instructor, room and timeslot variables.
+"""
+from scheduler.assignment import Assignment
+from scheduler.exceptions import ImpossibleAssignments
+from scheduler.propagation import Propagator
+from scheduler.state import SearchState
+from scheduler.helper import bit, count_bits, iter_bits
+
+
+# The kinds of the three variables of every lecture.
+INSTRUCTOR, ROOM, TIMESLOT = 0, 1, 2
+
+
+class FactorizedModel():
+    """
+    Gives every lecture three variables, its instructor, room and timeslot,
+    instead of one over all their combinations. Variable 3 * l + kind belongs
+    to the l-th lecture and is a bitset over the instructors, rooms or
+    timeslots, so the model grows with their sum rather than their product.
+    """
+    def __init__(self, lectures, instructors, rooms, timeslots, registry=None):
+        """
+        Constructor
+
+        Args:
+            registry (ValueRegistry): Interns the assignments of schedules.
+        """
+        self._registry = registry
+        self.lectures = list(lectures)
+        self.instructors = list(instructors)
+        self.rooms = list(rooms)
+        self.timeslots = list(timeslots)
+        self.lecture_ids = {lecture: i for i, lecture in enumerate(self.lectures)}
+        self._timeslot_ids = {timeslot: i for i, timeslot in enumerate(self.timeslots)}
+
+        # The timeslots at which each instructor and room is available and
+        # the instructors and rooms available at each timeslot.
+        self.instructor_times = [self._timeslot_mask(instructor.timeslots)
+                                 for instructor in self.instructors]
+        self.room_times = [self._timeslot_mask(room.timeslots) for room in self.rooms]
+        self.timeslot_instructors = self._transpose(self.instructor_times)
+        self.timeslot_rooms = self._transpose(self.room_times)
+
+        instructor_domains = self._lecture_masks(self.instructors, self.instructor_times)
+        room_domains = self._lecture_masks(self.rooms, self.room_times)
+        self.domains = []
+        for instructors, rooms in zip(instructor_domains, room_domains):
+            timeslots = (_union(self.instructor_times, instructors) &
+                         _union(self.room_times, rooms))
+            self.domains += [instructors, rooms, timeslots]
+
+        # The lectures that can be given by each instructor or held in each
+        # room, by kind of resource.
+        self.resource_lectures = {INSTRUCTOR: [[] for _ in self.instructors],
+                                  ROOM: [[] for _ in self.rooms]}
+        for lecture in range(self.n_lectures):
+            for kind, lectures in self.resource_lectures.items():
+                for resource in iter_bits(self.domains[self.variable(lecture, kind)]):
+                    lectures[resource].append(lecture)
+        self.instructor_masks = {instructor: bit(i)
+                                 for i, instructor in enumerate(self.instructors)}
+        self._degrees = None
+
+    @property
+    def n_lectures(self):
+        return len(self.lectures)
+
+    @property
+    def n_variables(self):
+        """The number of variables of the search, three per lecture."""
+        return 3 * len(self.lectures)
+
+    @staticmethod
+    def variable(lecture, kind):
+        """Get the variable of a lecture for a kind of value."""
+        return 3 * lecture + kind
+
+    def variables(self, lecture):
+        """Get the instructor, room and timeslot variables of a lecture."""
+        return range(3 * lecture, 3 * lecture + 3)
+
+    def resource_groups(self):
+        """
+        Get the lectures that can be given by each instructor and held in
+        each room, as one list per resource.
+        """
+        return self.resource_lectures[INSTRUCTOR] + self.resource_lectures[ROOM]
+
+    def degrees(self):
+        """
+        Get the number of other lectures the lecture of each variable can
+        share an instructor or a room with.
+        """
+        if self._degrees is None:
+            neighbours = [set() for _ in self.lectures]
+            for index in self.resource_lectures.values():
+                for lectures in index:
+                    for lecture in lectures:
+                        neighbours[lecture].update(lectures)
+            self._degrees = [max(len(others) - 1, 0)
+                             for others in neighbours for _ in range(3)]
+        return self._degrees
+
+    def extract_schedule(self, assigned):
+        """
+        Get the dictionary mapping each lecture whose three variables are
+        assigned to its assignment, given the index of the assigned value of
+        each variable.
+        """
+        schedule = {}
+        for lecture, name in enumerate(self.lectures):
+            instructor, room, timeslot = assigned[3 * lecture:3 * lecture + 3]
+            if instructor is not None and room is not None and timeslot is not None:
+                assignment = Assignment(self.instructors[instructor], self.rooms[room],
+                                        self.timeslots[timeslot])
+                if self._registry is not None:
+                    assignment = self._registry.intern(assignment)
+                schedule[name] = assignment
+        return schedule
+
+    def encode_schedule(self, schedule):
+        """
+        Get the index of the value of each variable in a schedule, which may
+        come from another timetable. Variables of lectures that are not 
+        scheduled or whose instructor, room or timeslot is not part of the 
+        model get None.
+        """
+        ids = [{value: i for i, value in enumerate(values)}
+               for values in (self.instructors, self.rooms, self.timeslots)]
+        encoded = []
+        for lecture in self.lectures:
+            assignment = schedule.get(lecture)
+            if assignment is None:
+                encoded += [None] * 3
+            else:
+                encoded += [ids[INSTRUCTOR].get(assignment.instructor),
+                            ids[ROOM].get(assignment.room),
+                            ids[TIMESLOT].get(assignment.timeslot)]
+        return encoded
+
+    def is_possible(self, lecture, values):
+        """
+        Check whether a lecture can be assigned the given instructor, room 
+        and timeslot, e.g. from encode_schedule, according to the initial 
+        domains, which includes that both are available at the timeslot.
+        """
+        if None in values:
+            return False
+        if not all(self.domains[variable] >> value & 1
+                   for variable, value in zip(self.variables(lecture), values)):
+            return False
+        instructor, room, timeslot = values
+        return (self.instructor_times[instructor] >> timeslot & 1 == 1 and
+                self.room_times[room] >> timeslot & 1 == 1)
+
+    def _timeslot_mask(self, timeslots):
+        """Get the bitset of the timeslots of the model in a collection."""
+        mask = 0
+        for timeslot in timeslots:
+            timeslot_id = self._timeslot_ids.get(timeslot)
+            if timeslot_id is not None:
+                mask |= bit(timeslot_id)
+        return mask
+
+    def _lecture_masks(self, resources, times):
+        """Get the bitset of the available resources that suit each lecture."""
+        masks = [0] * self.n_lectures
+        for i, resource in enumerate(resources):
+            if times[i]:
+                for lecture in resource.lectures:
+                    lecture_id = self.lecture_ids.get(lecture)
+                    if lecture_id is not None:
+                        masks[lecture_id] |= bit(i)
+        return masks
+
+    def _transpose(self, masks):
+        """Get the resources available at each timeslot."""
+        transposed = [0] * len(self.timeslots)
+        for resource, mask in enumerate(masks):
+            for timeslot in iter_bits(mask):
+                transposed[timeslot] |= bit(resource)
+        return transposed
+
+
+class FactorizedState(SearchState):
+    """
+    The search state of a factorized model. It additionally keeps the
+    timeslots at which each instructor and room is taken by a lecture whose
+    variables are all assigned, and the reverse.
+    """
+    def __init__(self, model):
+        """
+        Constructor
+        """
+        super().__init__(model)
+        self.resource_times = {INSTRUCTOR: [0] * len(model.instructors),
+                               ROOM: [0] * len(model.rooms)}
+        self.time_resources = {INSTRUCTOR: [0] * len(model.timeslots),
+                               ROOM: [0] * len(model.timeslots)}
+
+    def _count_load(self, lecture, index):
+        if lecture % 3 == INSTRUCTOR:
+            self.set_item(self.instructor_loads, index, self.instructor_loads[index] + 1)
+
+
+class LectureSelector():
+    """
+    Minimum remaining values heuristic for the factorized model. A lecture
+    whose timeslot is assigned is completed first. Otherwise the lecture with
+    the fewest timeslots is chosen, then its variable with the smallest
+    domain.
+    """
+    def __init__(self, state):
+        """
+        Constructor
+        """
+        self._degrees = state.model.degrees()
+
+    def select(self, state):
+        """Get the unassigned variable to branch on."""
+        domains = state.domains
+        assigned = state.assigned
+        # The first variable of the chosen lecture.
+        best_first = None
+        best_key = None
+        for first in range(0, len(assigned), 3):
+            if assigned[first + TIMESLOT] is not None:
+                if assigned[first + INSTRUCTOR] is None or assigned[first + ROOM] is None:
+                    best_first = first
+                    break
+                continue
+            key = (count_bits(domains[first + TIMESLOT]), -self._degrees[first])
+            if best_key is None or key < best_key:
+                best_key = key
+                best_first = first
+        return min((variable for variable in range(best_first, best_first + 3)
+                    if assigned[variable] is None),
+                   key=lambda variable: count_bits(domains[variable]))
+
+
+class AvailabilityPropagator(Propagator):
+    """
+    Channel the timeslot of a lecture with its instructor and its room: each
+    of them has to be available at the timeslot.
+    """
+    def __init__(self, model):
+        """
+        Constructor
+        """
+        self._model = model
+
+    def on_domain_change(self, engine, state, variable):
+        model = self._model
+        kind = variable % 3
+        domains = state.domains
+        domain = domains[variable]
+        timeslot_variable = variable - kind + TIMESLOT
+        if kind == TIMESLOT:
+            for other_kind, available in ((INSTRUCTOR, model.timeslot_instructors),
+                                          (ROOM, model.timeslot_rooms)):
+                other = variable - kind + other_kind
+                engine.restrict(state, other,
+                                domains[other] & _union(available, domain))
+        else:
+            times = model.instructor_times if kind == INSTRUCTOR else model.room_times
+            engine.restrict(state, timeslot_variable,
+                            domains[timeslot_variable] & _union(times, domain))
+
+
+class ResourceTimePropagator(Propagator):
+    """
+    Lectures must not share an instructor, or a room for the other instance,
+    at the same timeslot. Once both are assigned, the pair is removed from
+    the lectures that have one of them assigned.
+    """
+    def __init__(self, model, kind):
+        """
+        Constructor
+
+        Args:
+            model (FactorizedModel): The model the constraint is posted on.
+            kind (int): INSTRUCTOR or ROOM.
+        """
+        self._model = model
+        self._kind = kind
+        self._lectures = model.resource_lectures[kind]
+
+    def on_assign(self, engine, state, variable, index):
+        lecture, kind = divmod(variable, 3)
+        resource_variable = variable - kind + self._kind
+        timeslot_variable = variable - kind + TIMESLOT
+        if kind == self._kind:
+            resource, timeslot = index, state.assigned[timeslot_variable]
+        elif kind == TIMESLOT:
+            resource, timeslot = state.assigned[resource_variable], index
+        else:
+            return
+        if resource is None:
+            taken = state.time_resources[self._kind][timeslot]
+            if state.domains[resource_variable] & taken:
+                engine.restrict(state, resource_variable,
+                                state.domains[resource_variable] & ~taken,
+                                self._explain(engine, state, variable, None, timeslot))
+        elif timeslot is None:
+            taken = state.resource_times[self._kind][resource]
+            if state.domains[timeslot_variable] & taken:
+                engine.restrict(state, timeslot_variable,
+                                state.domains[timeslot_variable] & ~taken,
+                                self._explain(engine, state, variable, resource, None))
+        else:
+            self._take(engine, state, lecture, resource, timeslot)
+
+    def _take(self, engine, state, lecture, resource, timeslot):
+        """Take a pair of a resource and a timeslot for an assigned lecture."""
+        resource_times = state.resource_times[self._kind]
+        time_resources = state.time_resources[self._kind]
+        reason = None
+        if engine.explain:
+            reason = self._reason(state, lecture)
+        if resource_times[resource] >> timeslot & 1:
+            if reason is not None:
+                reason |= self._explain(engine, state, None, resource, timeslot)
+            raise ImpossibleAssignments('Resource is used twice at the same time.',
+                                        (3 * lecture + self._kind,), reason)
+        state.set_item(resource_times, resource, resource_times[resource] | bit(timeslot))
+        state.set_item(time_resources, timeslot, time_resources[timeslot] | bit(resource))
+
+        assigned = state.assigned
+        domains = state.domains
+        for other in self._lectures[resource]:
+            if other == lecture:
+                continue
+            resource_variable = 3 * other + self._kind
+            timeslot_variable = 3 * other + TIMESLOT
+            if (assigned[resource_variable] == resource and
+                assigned[timeslot_variable] is None):
+                target, value = timeslot_variable, timeslot
+                cause = resource_variable
+            elif (assigned[timeslot_variable] == timeslot and
+                  assigned[resource_variable] is None):
+                target, value = resource_variable, resource
+                cause = timeslot_variable
+            else:
+                continue
+            if domains[target] >> value & 1:
+                engine.restrict(state, target, domains[target] & ~bit(value),
+                                None if reason is None else reason | state.reasons[cause])
+
+    def _explain(self, engine, state, variable, resource, timeslot):
+        """
+        Get the reasons of a variable together with the ones of all lectures
+        that take the given resource or timeslot, or both.
+        """
+        if not engine.explain:
+            return None
+        reason = 0 if variable is None else state.reasons[variable]
+        assigned = state.assigned
+        candidates = (self._lectures[resource] if resource is not None else
+                      range(self._model.n_lectures))
+        for other in candidates:
+            other_resource = assigned[3 * other + self._kind]
+            other_timeslot = assigned[3 * other + TIMESLOT]
+            if other_resource is None or other_timeslot is None:
+                continue
+            if ((resource is None or other_resource == resource) and
+                (timeslot is None or other_timeslot == timeslot)):
+                reason |= self._reason(state, other)
+        return reason
+
+    def _reason(self, state, lecture):
+        """Get the reasons of the resource and the timeslot of a lecture."""
+        return state.reasons[3 * lecture + self._kind] | state.reasons[3 * lecture + TIMESLOT]
+
+
+class FactorizedLoadPropagator(Propagator):
+    """
+    Remove an instructor from the other lectures once they give the maximum
+    number of lectures, like InstructorLoadPropagator for the product model.
+    """
+    def __init__(self, model, max_lectures_per_instructor):
+        """
+        Constructor
+        """
+        self._model = model
+        self._max_lectures_per_instructor = max_lectures_per_instructor
+
+    def on_assign(self, engine, state, variable, index):
+        if variable % 3 != INSTRUCTOR:
+            return
+        if state.instructor_loads[index] >= self._max_lectures_per_instructor:
+            variables = [3 * lecture + INSTRUCTOR
+                         for lecture in self._model.resource_lectures[INSTRUCTOR][index]]
+            reason = None
+            if engine.explain:
+                reason = 0
+                for other in variables:
+                    if state.assigned[other] == index:
+                        reason |= state.reasons[other]
+            engine.remove_from(state, variables, bit(index), reason)
+
+
+def _union(masks, selection):
+    """Get the union of the masks selected by a bitset."""
+    union = 0
+    for i in iter_bits(selection):
+        union |= masks[i]
+    return union
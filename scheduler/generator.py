@@ -0,0 +1,78 @@
+"""
+Random timetabling instances in the list format of the Timetable.
+"""
+import math
+import random
+
+
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']
+
+
+def generate_instance(n_lectures, n_instructors, n_rooms, n_timeslots,
+                      qualification_density=0.2, availability_density=0.8,
+                      max_lectures_per_instructor=None, n_groups=None, seed=None):
+    """
+    Generate the arguments of a Timetable, in the order of its constructor.
+
+    Instructors and rooms qualify for each lecture with the qualification
+    density, but every lecture gets at least one of each. They are available
+    at about the availability density of the timeslots. With n_groups they
+    only qualify within that many departments.
+
+    Args:
+        n_timeslots (int): The number of timeslots, at most six per day.
+        max_lectures_per_instructor (int): By default one and a half times
+            the average number of lectures per instructor.
+        seed (int): The seed of the random choices.
+    """
+    if n_timeslots > 6 * len(DAYS):
+        raise ValueError('At most %d timeslots are supported.' % (6 * len(DAYS)))
+    rng = random.Random(seed)
+    n_times = math.ceil(n_timeslots / len(DAYS))
+    times = ['%d-%d' % (start, start + 2) for start in range(8, 8 + 2 * n_times, 2)]
+    timeslot_list = ['%s %s' % (day, time) for time in times for day in DAYS][:n_timeslots]
+    days = sorted({timeslot.split()[0] for timeslot in timeslot_list}, key=DAYS.index)
+
+    lecture_list = ['Lecture %d' % (i + 1) for i in range(n_lectures)]
+    n_groups = n_groups or 1
+    lecture_groups = _split(n_lectures, n_groups)
+    instructor_groups = _split(n_instructors, n_groups)
+    room_groups = _split(n_rooms, n_groups)
+
+    instructor_lectures = [[] for _ in range(n_instructors)]
+    room_lectures = [[] for _ in range(n_rooms)]
+    for lecture, group in zip(lecture_list, lecture_groups):
+        for lectures, groups in ((instructor_lectures, instructor_groups),
+                                 (room_lectures, room_groups)):
+            candidates = [i for i, other in enumerate(groups) if other == group]
+            qualified = [i for i in candidates if rng.random() < qualification_density]
+            for i in qualified or [rng.choice(candidates)]:
+                lectures[i].append(lecture)
+
+    instructor_list = [['Instructor %d' % (i + 1), lectures] +
+                       _availability(rng, days, times, availability_density)
+                       for i, lectures in enumerate(instructor_lectures)]
+    room_list = [['Room %d' % (i + 1), lectures] +
+                 _availability(rng, days, times, availability_density)
+                 for i, lectures in enumerate(room_lectures)]
+    if max_lectures_per_instructor is None:
+        max_lectures_per_instructor = math.ceil(1.5 * n_lectures / n_instructors)
+    return lecture_list, instructor_list, room_list, timeslot_list, max_lectures_per_instructor
+
+
+def _split(n, n_groups):
+    """Get the group of each of n items split into groups of equal size."""
+    if n < n_groups:
+        raise ValueError('Every group needs at least one of each kind.')
+    return [i * n_groups // n for i in range(n)]
+
+
+def _availability(rng, days, times, density):
+    """
+    Choose the days and times at which an instructor or a room is available.
+    An empty list means no restriction, so both always contain something.
+    """
+    probability = math.sqrt(density)
+    available_days = [day for day in days if rng.random() < probability]
+    available_times = [time for time in times if rng.random() < probability]
+    return [available_days or [rng.choice(days)], available_times or [rng.choice(times)]]
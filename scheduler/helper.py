@@ -1,28 +1,84 @@
 """
 Some helper functions used throughout the scheduler.
 """
-from collections import OrderedDict
-from prettytable import PrettyTable
-    
-    
-def format_for_print(df):
-    """Print dataframe as pretty table."""    
-    table = PrettyTable(list(df.columns))
-    
-    for row in df.itertuples():
-        table.add_row(row[1:])
-    return str(table)
 
 
-def sort_dict_by_mrv(d):
-    """Sort dictionary according to minimun remaining values heuristic."""
-    return OrderedDict(sorted(d.items(), key=lambda x: len(x[1]) if isinstance(x[1], set) else 0))
+def format_for_print(columns, rows):
+    """
+    Format rows as a table. It is drawn by prettytable if it is installed,
+    which is only imported here, and in plain aligned columns otherwise.
+    """
+    try:
+        from prettytable import PrettyTable
+    except ImportError:
+        PrettyTable = None
+    if PrettyTable is not None:
+        table = PrettyTable(list(columns))
+        for row in rows:
+            table.add_row(list(row))
+        return str(table)
+
+    widths = [max([len(str(value)) for value in column]) 
+              for column in zip(columns, *rows)]
+    lines = ['  '.join(str(value).ljust(width) for value, width in zip(row, widths)).rstrip()
+             for row in [columns] + list(rows)]
+    lines.insert(1, '  '.join('-' * width for width in widths))
+    return '\n'.join(lines)
+
 
 def get_first_element(iterable):
     
     return next(iter(iterable))
 
 
+def bit(index):
+    """Get the bitset that only contains the given index."""
+    return 1 << index
+
+
+def bitset(indices):
+    """Get the bitset that contains the given indices."""
+    indices = list(indices)
+    if not indices:
+        return 0
+    data = bytearray(max(indices) // 8 + 1)
+    for index in indices:
+        data[index >> 3] |= 1 << (index & 7)
+    return int.from_bytes(data, 'little')
+
+
+def count_bits(mask):
+    """Get the number of elements in a bitset."""
+    return bin(mask).count('1')
+
+
+if hasattr(int, 'bit_count'):
+    # Use the native population count where available (Python 3.10+).
+    count_bits = int.bit_count
+
+
+def lowest_bit(mask):
+    """Get the smallest index contained in a non-empty bitset."""
+    return (mask & -mask).bit_length() - 1
+
+
+def iter_bits(mask):
+    """Iterate over the indices contained in a bitset in ascending order."""
+    if mask.bit_length() <= 256:
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+    else:
+        # Clearing the lowest bit copies the whole integer, which makes wide
+        # bitsets quadratic. Searching the binary digits is linear instead.
+        digits = bin(mask)[:1:-1]
+        index = digits.find('1')
+        while index != -1:
+            yield index
+            index = digits.find('1', index + 1)
+
+
 
 
 
@@ -0,0 +1,141 @@
+"""
+Heuristics that choose the lecture to branch on.
+"""
+from scheduler.helper import count_bits
+
+
+class LectureQueue():
+    """
+    Unassigned lectures in buckets by domain size and then by decreasing
+    degree, for the minimum remaining values heuristic. It listens to the
+    search state, so a changed domain moves its lecture in constant time.
+    Ties within a bucket go to the lowest lecture.
+    """
+    def __init__(self, state):
+        """
+        Constructor
+        """
+        degrees = state.model.degrees()
+        # Rank the lectures by degree so that the rank can be part of the key.
+        distinct_degrees = sorted(set(degrees), reverse=True)
+        rank_of_degree = {degree: rank for rank, degree in enumerate(distinct_degrees)}
+        self._ranks = [rank_of_degree[degree] for degree in degrees]
+        self._n_ranks = max(len(distinct_degrees), 1)
+        self._domains = state.domains
+        self._buckets = {}
+        self._keys = [None] * len(state.domains)
+        self._min_key = 0
+        for lecture in state.unassigned():
+            self._insert(lecture)
+        state.add_listener(self)
+
+    def select(self, state):
+        """Get the unassigned lecture with the fewest remaining values."""
+        buckets = self._buckets
+        while self._min_key not in buckets:
+            self._min_key += 1
+        return min(buckets[self._min_key])
+
+    def domain_changed(self, lecture, domain):
+        if self._keys[lecture] is not None:
+            self._remove(lecture)
+            self._insert(lecture)
+
+    def assigned(self, lecture):
+        self._remove(lecture)
+
+    def unassigned(self, lecture):
+        self._insert(lecture)
+
+    def _insert(self, lecture):
+        key = count_bits(self._domains[lecture]) * self._n_ranks + self._ranks[lecture]
+        self._keys[lecture] = key
+        self._buckets.setdefault(key, set()).add(lecture)
+        if key < self._min_key:
+            self._min_key = key
+
+    def _remove(self, lecture):
+        key = self._keys[lecture]
+        bucket = self._buckets[key]
+        bucket.discard(lecture)
+        if not bucket:
+            del self._buckets[key]
+        self._keys[lecture] = None
+
+
+class WeightedDegreeSelector():
+    """
+    Conflict-weighted variable ordering (dom/wdeg). The weight of a lecture
+    grows whenever its domain is wiped out, and the lecture with the smallest
+    ratio of domain size to weight is chosen. Ties are broken randomly.
+    """
+    def __init__(self, state, rng):
+        """
+        Constructor
+
+        Args:
+            state (SearchState): The state the lectures are selected from.
+            rng (random.Random): The source of randomness for tie-breaking.
+        """
+        self._weights = [1] * len(state.domains)
+        self._rng = rng
+
+    def select(self, state):
+        """Get the unassigned lecture with the smallest dom/wdeg ratio."""
+        domains = state.domains
+        weights = self._weights
+        best_score = None
+        best = []
+        for lecture in state.unassigned():
+            score = count_bits(domains[lecture]) / weights[lecture]
+            if best_score is None or score < best_score:
+                best_score = score
+                best = [lecture]
+            elif score == best_score:
+                best.append(lecture)
+        return best[0] if len(best) == 1 else self._rng.choice(best)
+
+    def bump(self, error):
+        """Increase the weights of the lectures that caused a failure."""
+        for lecture in error.lectures:
+            self._weights[lecture] += 1
+
+
+def luby(i):
+    """
+    Get the i-th element (starting at 1) of the Luby sequence 
+    1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ...
+    """
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while i != (1 << k) - 1:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+def restart_cutoffs(schedule, scale, factor=1.5):
+    """
+    Generate the number of failures after which the search is restarted.
+
+    Args:
+        schedule (str): Either 'luby' for the Luby sequence or 'geometric'
+            for a geometrically growing cutoff.
+        scale (int): The cutoff of the first run.
+        factor (float): The growth factor of the geometric schedule.
+    """
+    if schedule == 'luby':
+        i = 1
+        while True:
+            yield scale * luby(i)
+            i += 1
+    elif schedule == 'geometric':
+        cutoff = scale
+        while True:
+            yield int(cutoff)
+            cutoff *= factor
+    else:
+        raise ValueError('Unknown restart schedule %s.' % schedule)
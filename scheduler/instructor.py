@@ -1,15 +1,34 @@
+from scheduler.registry import InternedValue
 
-class Instructor():
+
+class Instructor(InternedValue):
     """
     A instructor can give certain lectures at certain times.
+    Instructors are identified by their name.
     """
+    __slots__ = ('_key', '_lectures', '_timeslots')
+
     def __init__(self, name, lectures, timeslots):
         """
         Constructor
         """
-        self._name = name
-        self._lectures = lectures
-        self._timeslots = timeslots
+        self._set('_key', name)
+        # Sets, so that the checks below take constant time.
+        self._set('_lectures', frozenset(lectures))
+        self._set('_timeslots', frozenset(timeslots))
+        super().__init__()
+
+    @property
+    def name(self):
+        return self._key
+
+    @property
+    def lectures(self):
+        return self._lectures
+
+    @property
+    def timeslots(self):
+        return self._timeslots
         
     def can_teach(self, lecture):
         """
@@ -24,13 +43,7 @@ class Instructor():
         return timeslot in self._timeslots
     
     def __repr__(self):
-        return '<Instructor  {}>'.format(self._name)
+        return '<Instructor  {}>'.format(self._key)
     
     def __str__(self):
-        return '{}'.format(self._name)
-    
-    def __eq__(self, other):
-        return self._name == other._name 
-    
-    def __hash__(self):
-        return hash(self._name)
\ No newline at end of file
+        return '{}'.format(self._key)
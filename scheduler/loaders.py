@@ -0,0 +1,88 @@
+"""
+Timetables from JSON and CSV files.
+
+A JSON specification is an object with the keys of the Timetable arguments:
+
+    {"lecture_list": ["Methods of AI", ...],
+     "instructor_list": [{"name": "Potyka", "lectures": ["Methods of AI"],
+                          "days": [], "times": ["10-12", "12-14"]}, ...],
+     "room_list": [{"number": 1, "lectures": ["Methods of AI"],
+                    "days": ["Mon", "Thu"], "times": []}, ...],
+     "timeslot_list": ["Mon 8-10", ...],
+     "max_lectures_per_instructor": 3}
+
+Instructors and rooms may also be given as lists like in Python. In CSV
+files instructors and rooms are rows with the columns name or number,
+lectures, days and times, where lists are separated by semicolons.
+Lectures and timeslots are files with a single column, name or timeslot.
+"""
+import csv
+import json
+from scheduler.timetable import Timetable
+
+
+LIST_SEPARATOR = ';'
+
+
+def load_json(path, **options):
+    """
+    Construct a timetable from a JSON file, where further arguments of the
+    Timetable override the ones of the file.
+    """
+    with open(path, encoding='utf-8') as file:
+        spec = json.load(file)
+    spec['instructor_list'] = _iter_resources(spec.get('instructor_list', ()), 'name')
+    spec['room_list'] = _iter_resources(spec.get('room_list', ()), 'number')
+    spec.update(options)
+    return Timetable(**spec)
+
+
+def load_csv(lectures, instructors, rooms, timeslots, max_lectures_per_instructor,
+             **options):
+    """
+    Construct a timetable from CSV files with a header row, read one row at
+    a time. Room numbers that are digits only are read as integers.
+    """
+    return Timetable(_read_column(lectures, 'name'),
+                     _read_resources(instructors, 'name'),
+                     _read_resources(rooms, 'number', _parse_number),
+                     _read_column(timeslots, 'timeslot'),
+                     max_lectures_per_instructor, **options)
+
+
+def _iter_resources(specs, key):
+    """Convert instructor or room objects of a JSON file into list specifications."""
+    for spec in specs:
+        if isinstance(spec, dict):
+            yield [spec[key], spec.get('lectures', []), spec.get('days', []),
+                   spec.get('times', [])]
+        else:
+            yield spec
+
+
+def _read_column(path, column):
+    """Read the non-empty values of a column of a CSV file."""
+    with open(path, newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            value = row[column].strip()
+            if value:
+                yield value
+
+
+def _read_resources(path, key, parse_key=str):
+    """Read instructor or room specifications from a CSV file."""
+    with open(path, newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            yield [parse_key(row[key].strip()), _split(row.get('lectures')),
+                   _split(row.get('days')), _split(row.get('times'))]
+
+
+def _split(value):
+    """Split a list of a CSV cell."""
+    if not value:
+        return []
+    return [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+
+
+def _parse_number(number):
+    return int(number) if number.isdigit() else number
@@ -0,0 +1,201 @@
+"""
+Min-conflicts local search with a tabu list and random walk.
+"""
+from scheduler.exceptions import SearchLimitReached
+from scheduler.helper import iter_bits
+
+
+class MinConflictsSearch():
+    """
+    Repair a complete but possibly conflicting assignment of all lectures.
+
+    The cost is by how much the capacities of instructors and rooms at a time
+    and of instructors as a whole are exceeded, counted incrementally. Each
+    step moves a lecture of an overfull resource to its cheapest value that
+    is not tabu, or with a small probability to a random value.
+    """
+    def __init__(self, model, max_lectures_per_instructor, rng, tabu_tenure=10,
+                 walk_probability=0.02):
+        """
+        Constructor
+
+        Args:
+            max_lectures_per_instructor (int): The capacity of instructors.
+            rng (random.Random): Source of all random choices.
+            tabu_tenure (int): The number of steps a lecture must not return to
+                a value it has just left.
+            walk_probability (float): The probability of a random move.
+        """
+        self._model = model
+        self._rng = rng
+        self._tabu_tenure = tabu_tenure
+        self._walk_probability = walk_probability
+        self._values = [list(iter_bits(domain)) for domain in model.domains]
+
+        # Number the resources and store the three resources of every value.
+        self._capacities = []
+        self._value_resources = [[] for _ in range(model.n_assignments)]
+        for masks, capacity in ((model.instructor_time_masks, 1),
+                                (model.room_time_masks, 1),
+                                (model.instructor_masks, max_lectures_per_instructor)):
+            for mask in masks.values():
+                for index in iter_bits(mask):
+                    self._value_resources[index].append(len(self._capacities))
+                self._capacities.append(capacity)
+        self._value_resources = [tuple(resources) for resources in self._value_resources]
+
+        self.n_steps = 0
+        self.cost = None
+        self.best_cost = None
+        self.best_assigned = None
+
+    def solve(self, should_stop=None):
+        """
+        Search until no capacity is exceeded.
+
+        Returns:
+            The index of the assigned value of each lecture.
+
+        Raises:
+            SearchLimitReached: If should_stop returned a reason. The best
+                assignment is kept in best_assigned.
+        """
+        rng = self._rng
+        self._initialize()
+        # The step until which a value is tabu for a lecture.
+        tabu = {}
+        while self.cost:
+            if should_stop is not None:
+                reason = should_stop()
+                if reason:
+                    raise SearchLimitReached('The search has been stopped.', reason)
+            self.n_steps += 1
+            lecture = self._select_lecture()
+            values = self._values[lecture]
+            if len(values) < 2:
+                continue
+            current = self._assigned[lecture]
+            if rng.random() < self._walk_probability:
+                value = rng.choice(values)
+                if value == current:
+                    continue
+            else:
+                value = self._select_value(lecture, current, values, tabu)
+                if value is None:
+                    continue
+            self._move(lecture, value)
+            tabu[(lecture, current)] = self.n_steps + self._tabu_tenure
+            if self.cost < self.best_cost:
+                self.best_cost = self.cost
+                self.best_assigned = list(self._assigned)
+        return self.best_assigned
+
+    def _initialize(self):
+        """Assign every lecture greedily to the value with the lowest cost."""
+        self._counts = [0] * len(self._capacities)
+        # The lectures that use each resource.
+        self._users = [set() for _ in self._capacities]
+        self._overfull = set()
+        self._assigned = [None] * self._model.n_lectures
+        self.cost = 0
+        lectures = sorted(range(self._model.n_lectures),
+                          key=lambda lecture: len(self._values[lecture]))
+        for lecture in lectures:
+            values = self._values[lecture]
+            if values:
+                costs = [self._delta(value) for value in values]
+                lowest = min(costs)
+                value = self._rng.choice([value for value, cost in zip(values, costs)
+                                          if cost == lowest])
+                self._place(lecture, value)
+        self.best_cost = self.cost
+        self.best_assigned = list(self._assigned)
+
+    def _select_lecture(self):
+        """Get a random lecture that uses a random overfull resource."""
+        resource = self._rng.choice(tuple(self._overfull))
+        return self._rng.choice(tuple(self._users[resource]))
+
+    def _select_value(self, lecture, current, values, tabu):
+        """Get the value with the lowest cost that is not tabu."""
+        freed = self._value_resources[current]
+        best_delta = None
+        best_values = []
+        for value in values:
+            if value == current:
+                continue
+            delta = self._delta(value, freed)
+            if (tabu.get((lecture, value), 0) > self.n_steps and
+                self.cost + delta >= self.best_cost):
+                continue
+            if best_delta is None or delta < best_delta:
+                best_delta = delta
+                best_values = [value]
+            elif delta == best_delta:
+                best_values.append(value)
+        if not best_values:
+            return None
+        return self._rng.choice(best_values)
+
+    def _delta(self, value, freed=()):
+        """
+        Get the change of the cost if a lecture that uses the given resources
+        moves to a value.
+        """
+        counts, capacities = self._counts, self._capacities
+        resources = self._value_resources[value]
+        delta = 0
+        for resource in resources:
+            if resource not in freed and counts[resource] >= capacities[resource]:
+                delta += 1
+        for resource in freed:
+            if resource not in resources and counts[resource] > capacities[resource]:
+                delta -= 1
+        return delta
+
+    def _move(self, lecture, value):
+        self._remove(lecture)
+        self._place(lecture, value)
+
+    def _place(self, lecture, value):
+        self._assigned[lecture] = value
+        for resource in self._value_resources[value]:
+            self._counts[resource] += 1
+            self._users[resource].add(lecture)
+            if self._counts[resource] > self._capacities[resource]:
+                self.cost += 1
+                self._overfull.add(resource)
+
+    def _remove(self, lecture):
+        value = self._assigned[lecture]
+        self._assigned[lecture] = None
+        for resource in self._value_resources[value]:
+            if self._counts[resource] > self._capacities[resource]:
+                self.cost -= 1
+            self._counts[resource] -= 1
+            self._users[resource].discard(lecture)
+            if self._counts[resource] <= self._capacities[resource]:
+                self._overfull.discard(resource)
+
+    def consistent_part(self, assigned):
+        """
+        Get a partial assignment without conflicts by dropping lectures from
+        every overfull resource of a complete assignment.
+        """
+        assigned = list(assigned)
+        counts = [0] * len(self._capacities)
+        for index in assigned:
+            if index is not None:
+                for resource in self._value_resources[index]:
+                    counts[resource] += 1
+        # Drop the lectures with the most overfull resources first.
+        def n_overfull(lecture):
+            return sum(1 for resource in self._value_resources[assigned[lecture]]
+                       if counts[resource] > self._capacities[resource])
+        for lecture in sorted((lecture for lecture, index in enumerate(assigned)
+                               if index is not None), key=n_overfull, reverse=True):
+            if n_overfull(lecture):
+                for resource in self._value_resources[assigned[lecture]]:
+                    counts[resource] -= 1
+                assigned[lecture] = None
+        return assigned
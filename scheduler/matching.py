@@ -0,0 +1,329 @@
+"""
+Global constraints that are propagated with bipartite matchings.
+"""
+from scheduler.exceptions import ImpossibleAssignments
+from scheduler.propagation import Propagator
+from scheduler.helper import iter_bits
+
+
+class ResourceMatchingPropagator(Propagator):
+    """
+    Every lecture uses one resource, e.g. a room at a certain time, and every
+    resource can be used by a limited number of lectures. Following Régin,
+    values outside every maximum flow from lectures to resources are removed
+    once the propagation queue is empty. The matching of the previous call is
+    repaired rather than found again.
+    """
+    def __init__(self, model, resource_masks, capacity=1, lectures=None,
+                 resource_lectures=None):
+        """
+        Constructor
+
+        Args:
+            resource_masks (dict): Maps each resource to the bitset of
+                assignments that use it.
+            capacity (int): How many lectures can use the same resource.
+            lectures (iterable): The variables the constraint is posted on,
+                all of the model by default.
+            resource_lectures (dict): Maps each resource to the lectures that
+                can use it, if the model has indexed them already.
+        """
+        self._model = model
+        self._masks = list(resource_masks.values())
+        self._capacity = capacity
+        if lectures is None:
+            lectures = range(model.n_variables)
+        self._lectures = list(lectures)
+        # The resource of each assignment and the assignments of any resource.
+        n_values = max([mask.bit_length() for mask in self._masks] or [0])
+        self._resources = [None] * n_values
+        self._covered = 0
+        for resource, mask in enumerate(self._masks):
+            self._covered |= mask
+            for index in iter_bits(mask):
+                self._resources[index] = resource
+        # The resources each lecture can use according to its initial domain
+        # and the other way round.
+        self._lecture_resources = [[] for _ in range(model.n_variables)]
+        self._resource_lectures = [[] for _ in self._masks]
+        if resource_lectures is None:
+            for lecture in self._lectures:
+                domain = model.domains[lecture]
+                self._lecture_resources[lecture] = [
+                    resource for resource, mask in enumerate(self._masks) if domain & mask]
+        else:
+            for resource, key in enumerate(resource_masks):
+                for lecture in resource_lectures[key]:
+                    self._lecture_resources[lecture].append(resource)
+        for lecture, resources in enumerate(self._lecture_resources):
+            for resource in resources:
+                self._resource_lectures[resource].append(lecture)
+        # The matching found by the last call, used as a warm start.
+        self._matching = [None] * model.n_variables
+
+    def on_domain_change(self, engine, state, lecture):
+        if self._lecture_resources[lecture]:
+            engine.schedule(self)
+
+    def propagate(self, engine, state):
+        assigned = state.assigned
+        lectures = [lecture for lecture in self._lectures if assigned[lecture] is None]
+        if not lectures:
+            return
+        capacities, exhausted = self._get_capacities(state)
+        matching, matched = self._find_matching(state, lectures, capacities)
+
+        # The values of the resources from which no alternating path leads
+        # to free capacity, and whether each lecture can reach it.
+        blocked, reached = self._find_blocked(state, lectures, matching, matched, 
+                                              capacities, exhausted)
+        closed = []
+        for node, lecture in enumerate(lectures):
+            if reached[node]:
+                # Blocked resources cannot be part of a maximum flow together
+                # with a resource that reaches free capacity.
+                domain = state.domains[lecture]
+                if domain & blocked:
+                    engine.restrict(state, lecture, domain & ~blocked)
+            else:
+                closed.append(node)
+        if closed:
+            self._prune_closed(engine, state, lectures, closed, matching, matched, 
+                               capacities, blocked)
+
+    def _prune_closed(self, engine, state, lectures, closed, matching, matched, capacities,
+                      blocked):
+        """
+        Remove the resources of lectures that cannot reach free capacity which
+        lie in another strongly connected component of the residual graph.
+        """
+        masks = self._masks
+        nodes = {}
+        successors = [[] for _ in closed]
+        for position, node in enumerate(closed):
+            domain = state.domains[lectures[node]]
+            for resource in self._lecture_resources[lectures[node]]:
+                if (domain & masks[resource] and capacities[resource] > 0 and
+                        blocked & masks[resource]):
+                    if resource not in nodes:
+                        nodes[resource] = len(successors)
+                        successors.append([])
+                    if resource != matching[node]:
+                        successors[position].append(nodes[resource])
+        positions = {node: position for position, node in enumerate(closed)}
+        for resource, resource_node in nodes.items():
+            for node in matched.get(resource, ()):
+                successors[resource_node].append(positions[node])
+
+        components = strongly_connected_components(successors)
+        for position, node in enumerate(closed):
+            lecture = lectures[node]
+            domain = state.domains[lecture]
+            removed = 0
+            for resource in self._lecture_resources[lecture]:
+                if domain & masks[resource] and resource != matching[node]:
+                    if (resource not in nodes or
+                            components[position] != components[nodes[resource]]):
+                        removed |= masks[resource]
+            if removed:
+                engine.restrict(state, lecture, domain & ~removed)
+
+    def _get_capacities(self, state):
+        """
+        Get how many unassigned lectures can still use each resource and the
+        resources that cannot be used anymore.
+        """
+        capacities = [self._capacity] * len(self._masks)
+        exhausted = []
+        resources = self._resources
+        assigned = state.assigned
+        for lecture in self._lectures:
+            index = assigned[lecture]
+            if index is not None:
+                resource = resources[index]
+                capacities[resource] -= 1
+                if capacities[resource] < 0:
+                    raise ImpossibleAssignments('Resource is used too often.')
+                if capacities[resource] == 0:
+                    exhausted.append(resource)
+        return capacities, exhausted
+
+    def _find_blocked(self, state, lectures, matching, matched, capacities, exhausted):
+        """
+        Find the resources from which no alternating path leads to free capacity.
+
+        Returns:
+            Their values and whether each lecture reaches free capacity.
+        """
+        masks = self._masks
+        reached = [True] * len(lectures)
+        blocked = 0
+        for resource in exhausted:
+            blocked |= masks[resource]
+        for resource, nodes in matched.items():
+            if len(nodes) >= capacities[resource]:
+                blocked |= masks[resource]
+        if not blocked:
+            return blocked, reached
+
+        domains = state.domains
+        available = self._covered & ~blocked
+        queue = []
+        for node, lecture in enumerate(lectures):
+            values = domains[lecture] & available
+            own = masks[matching[node]]
+            if values and values != values & own:
+                queue.append(matching[node])
+            else:
+                reached[node] = False
+        positions = None
+        while queue:
+            resource = queue.pop()
+            mask = masks[resource]
+            if not blocked & mask:
+                continue
+            blocked ^= mask
+            if positions is None:
+                positions = {lecture: node for node, lecture in enumerate(lectures)}
+            for lecture in self._resource_lectures[resource]:
+                node = positions.get(lecture)
+                if (node is not None and not reached[node] and matching[node] != resource and
+                        domains[lecture] & mask):
+                    reached[node] = True
+                    queue.append(matching[node])
+        return blocked, reached
+
+    def _find_matching(self, state, lectures, capacities):
+        """
+        Match every lecture to a resource without exceeding the capacities.
+
+        Returns:
+            The resource of each lecture and the lectures of each resource.
+
+        Raises:
+            ImpossibleAssignments: If not all lectures can be matched.
+        """
+        domains = state.domains
+        masks = self._masks
+        matching = [None] * len(lectures)
+        matched = {}
+        # Keep as much of the previous matching as is still valid.
+        for node, lecture in enumerate(lectures):
+            resource = self._matching[lecture]
+            if (resource is not None and capacities[resource] > 0 and
+                    domains[lecture] & masks[resource]):
+                nodes = matched.setdefault(resource, [])
+                if len(nodes) < capacities[resource]:
+                    matching[node] = resource
+                    nodes.append(node)
+
+        # The resources of a lecture are only listed once an alternating path
+        # passes through it.
+        adjacency = [None] * len(lectures)
+
+        def get_resources(node):
+            if adjacency[node] is None:
+                domain = domains[lectures[node]]
+                adjacency[node] = [resource for resource in self._lecture_resources[lectures[node]]
+                                   if domain & masks[resource] and capacities[resource] > 0]
+            return adjacency[node]
+
+        for node in range(len(lectures)):
+            if matching[node] is None:
+                if not self._augment(node, get_resources, matching, matched, capacities):
+                    raise ImpossibleAssignments('Resources cannot be shared by all lectures.',
+                                                (lectures[node],))
+        for node, lecture in enumerate(lectures):
+            self._matching[lecture] = matching[node]
+        return matching, matched
+
+    def _augment(self, start, get_resources, matching, matched, capacities):
+        """
+        Search an alternating path from an unmatched lecture to a resource
+        with free capacity and shift the lectures along it.
+        """
+        visited = set()
+        # The frames of the depth-first search alternate between lectures and
+        # resources. Each holds the node, an iterator over its neighbours and
+        # the neighbour that is currently explored.
+        stack = [[start, iter(get_resources(start)), None]]
+        while stack:
+            frame = stack[-1]
+            at_lecture = len(stack) % 2 == 1
+            for child in frame[1]:
+                if at_lecture:
+                    if child in visited:
+                        continue
+                    visited.add(child)
+                    frame[2] = child
+                    if len(matched.get(child, ())) < capacities[child]:
+                        self._shift(stack, matching, matched)
+                        return True
+                    stack.append([child, iter(matched[child]), None])
+                else:
+                    frame[2] = child
+                    stack.append([child, iter(get_resources(child)), None])
+                break
+            else:
+                stack.pop()
+        return False
+
+    @staticmethod
+    def _shift(stack, matching, matched):
+        """Move every lecture on the path to the resource it explores."""
+        for lecture, _, resource in stack[::2]:
+            old = matching[lecture]
+            if old is not None:
+                matched[old].remove(lecture)
+            matching[lecture] = resource
+            matched.setdefault(resource, []).append(lecture)
+
+
+def strongly_connected_components(successors):
+    """
+    Label the nodes of a directed graph, given by the successors of each
+    node, with their strongly connected component (Tarjan, iteratively).
+    """
+    n_nodes = len(successors)
+    index = [None] * n_nodes
+    low = [0] * n_nodes
+    components = [None] * n_nodes
+    on_stack = [False] * n_nodes
+    stack = []
+    counter = 0
+    n_components = 0
+
+    for root in range(n_nodes):
+        if index[root] is not None:
+            continue
+        work = [(root, iter(successors[root]))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if index[child] is None:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack[child] = True
+                    work.append((child, iter(successors[child])))
+                    break
+                elif on_stack[child]:
+                    low[node] = min(low[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        components[member] = n_components
+                        if member == node:
+                            break
+                    n_components += 1
+    return components
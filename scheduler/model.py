@@ -0,0 +1,248 @@
+"""
+Compiled, integer-indexed representation of a timetabling problem.
+
+numpy is only imported by the methods that build matrices, so that
+importing the scheduler stays fast.
+"""
+from scheduler.helper import bitset
+
+
+class CompiledModel():
+    """
+    Numbers every assignment and stores the domain of each lecture as a
+    bitset. Bit i of a domain is set if the i-th assignment can be used for
+    the lecture, so copying, intersecting and counting domains are plain
+    integer operations.
+    """
+    def __init__(self, lectures, assignments):
+        """
+        Constructor
+        """
+        self.lectures = list(lectures)
+        self.assignments = list(assignments)
+        self.lecture_ids = {lecture: i for i, lecture in enumerate(self.lectures)}
+        # The indices of the assignments of each key, turned into bitsets
+        # at once since growing a bitset one bit at a time takes quadratic 
+        # time.
+        instructor_indices = {}
+        room_indices = {}
+        # Assignments that use an instructor or a room at a certain time.
+        instructor_time_indices = {}
+        room_time_indices = {}
+        for index, assignment in enumerate(self.assignments):
+            instructor_indices.setdefault(assignment.instructor, []).append(index)
+            room_indices.setdefault(assignment.room, []).append(index)
+            instructor_time_indices.setdefault(
+                (assignment.instructor, assignment.timeslot), []).append(index)
+            room_time_indices.setdefault(
+                (assignment.room, assignment.timeslot), []).append(index)
+        self.instructor_masks = self._to_masks(instructor_indices)
+        self.room_masks = self._to_masks(room_indices)
+        self.instructor_time_masks = self._to_masks(instructor_time_indices)
+        self.room_time_masks = self._to_masks(room_time_indices)
+
+        # Number the instructors so that their loads can be kept in lists.
+        self.instructors = list(self.instructor_masks)
+        instructor_ids = {instructor: i for i, instructor in enumerate(self.instructors)}
+        self.assignment_instructors = [instructor_ids[assignment.instructor]
+                                       for assignment in self.assignments]
+
+        self._construct_domains()
+        self._construct_conflict_index()
+        self._assignment_ids = None
+        self._degrees = None
+
+    @property
+    def n_lectures(self):
+        return len(self.lectures)
+
+    @property
+    def n_assignments(self):
+        return len(self.assignments)
+
+    @property
+    def n_variables(self):
+        """The number of variables of the search, one per lecture."""
+        return len(self.lectures)
+
+    def extract_schedule(self, assigned):
+        """
+        Get the dictionary mapping each assigned lecture to its assignment,
+        given the index of the assigned value of each lecture.
+        """
+        return {self.lectures[lecture]: self.assignments[index]
+                for lecture, index in enumerate(assigned)
+                if index is not None}
+
+    def encode_schedule(self, schedule):
+        """
+        Get the index of the value of each lecture in a schedule, which may
+        come from another timetable. Lectures that are not scheduled or whose
+        assignment is not part of the model get None.
+        """
+        return [self.index_of(schedule[lecture]) if lecture in schedule else None
+                for lecture in self.lectures]
+
+    def is_possible(self, lecture, values):
+        """
+        Check whether a lecture can be assigned the given values of its 
+        variables, e.g. from encode_schedule, according to the initial 
+        domains.
+        """
+        index, = values
+        return index is not None and self.domains[lecture] >> index & 1 == 1
+
+    def index_of(self, assignment):
+        """Get the index of an assignment, None if it is not part of the model."""
+        if self._assignment_ids is None:
+            self._assignment_ids = {assignment: index 
+                                    for index, assignment in enumerate(self.assignments)}
+        return self._assignment_ids.get(assignment)
+
+    def variables(self, lecture):
+        """Get the variables of a lecture, which is its own variable."""
+        return range(lecture, lecture + 1)
+
+    def conflict_mask(self, index):
+        """
+        Get the assignments that use the same instructor or the same room
+        at the same time as the assignment with the given index. The masks
+        are as wide as the model, so they are not kept, which would take 
+        memory quadratic in the number of assignments.
+        """
+        assignment = self.assignments[index]
+        return (self.instructor_time_masks[assignment.instructor, assignment.timeslot] |
+                self.room_time_masks[assignment.room, assignment.timeslot])
+
+    def conflicting_lectures(self, index):
+        """
+        Get the lectures whose initial domain contains an assignment that
+        conflicts with the assignment with the given index.
+        """
+        assignment = self.assignments[index]
+        return (self._instructor_time_lectures[assignment.instructor, assignment.timeslot] +
+                self._room_time_lectures[assignment.room, assignment.timeslot])
+
+    def instructor_lectures(self, instructor):
+        """Get the lectures whose initial domain contains the instructor."""
+        return self._instructor_lectures[instructor]
+
+    def resource_groups(self):
+        """
+        Get the lectures whose initial domain contains each instructor and
+        each room, as one list per resource.
+        """
+        return list(self._instructor_lectures.values()) + list(self._room_lectures.values())
+
+    def degrees(self):
+        """
+        Get the number of other lectures each lecture can share an 
+        instructor or a room with.
+        """
+        if self._degrees is None:
+            neighbours = [set() for _ in self.lectures]
+            for index in (self._instructor_lectures, self._room_lectures):
+                for lectures in index.values():
+                    for lecture in lectures:
+                        neighbours[lecture].update(lectures)
+            self._degrees = [len(others) - 1 if others else 0 for others in neighbours]
+        return self._degrees
+
+    def lectures_using(self, mask):
+        """Get the lectures whose initial domain intersects a bitset."""
+        return [lecture for lecture, domain in enumerate(self.domains) 
+                if domain & mask]
+
+    def _construct_conflict_index(self):
+        """
+        Map every instructor and room, alone and at each timeslot, to the
+        lectures that can use it, joined from the resources of each lecture
+        without looking at the domains.
+        """
+        timeslots = {}
+        for resource, timeslot in list(self.instructor_time_masks) + list(self.room_time_masks):
+            timeslots.setdefault(resource, []).append(timeslot)
+        self._instructor_time_lectures = {key: [] for key in self.instructor_time_masks}
+        self._room_time_lectures = {key: [] for key in self.room_time_masks}
+        self._instructor_lectures = {instructor: [] for instructor in self.instructor_masks}
+        self._room_lectures = {room: [] for room in self.room_masks}
+
+        for lecture, (instructors, rooms) in enumerate(zip(self._lecture_instructors,
+                                                           self._lecture_rooms)):
+            for resources, others, time_lectures, lectures in (
+                    (instructors, rooms, self._instructor_time_lectures,
+                     self._instructor_lectures),
+                    (rooms, instructors, self._room_time_lectures, self._room_lectures)):
+                other_timeslots = {timeslot for other in others for timeslot in timeslots[other]}
+                for resource in resources:
+                    usable = [timeslot for timeslot in timeslots[resource]
+                              if timeslot in other_timeslots]
+                    if usable:
+                        lectures[resource].append(lecture)
+                    for timeslot in usable:
+                        time_lectures[resource, timeslot].append(lecture)
+
+    def lecture_index(self, masks):
+        """
+        Get the index of the lectures that can use each key of one of the
+        mask dictionaries of the model, e.g. room_time_masks.
+        """
+        for candidate, index in ((self.instructor_time_masks, self._instructor_time_lectures),
+                                 (self.room_time_masks, self._room_time_lectures),
+                                 (self.instructor_masks, self._instructor_lectures),
+                                 (self.room_masks, self._room_lectures)):
+            if masks is candidate:
+                return index
+        return {key: self.lectures_using(mask) for key, mask in masks.items()}
+
+    def mask_array(self, mask):
+        """Convert a bitset into a boolean array over all assignments."""
+        import numpy as np
+        n_bytes = (self.n_assignments + 7) // 8
+        packed = np.frombuffer(mask.to_bytes(n_bytes, 'little'), dtype=np.uint8)
+        return np.unpackbits(packed, bitorder='little')[:self.n_assignments].astype(bool)
+
+    def mask_matrix(self, masks, columns=None):
+        """
+        Convert bitsets into a boolean matrix with one row per bitset and 
+        one column per assignment, or only the columns of the given indices.
+        """
+        import numpy as np
+        n_columns = self.n_assignments if columns is None else len(columns)
+        matrix = np.zeros((len(masks), n_columns), dtype=bool)
+        for row, mask in enumerate(masks):
+            array = self.mask_array(mask)
+            matrix[row] = array if columns is None else array[columns]
+        return matrix
+
+    def _construct_domains(self):
+        """
+        Construct the bitset of all assignments that satisfy each lecture by
+        joining the assignments of the instructors that can give it with the
+        ones of the rooms it can be held in.
+        """
+        self._lecture_instructors = self._index_resources(self.instructor_masks)
+        self._lecture_rooms = self._index_resources(self.room_masks)
+        self.domains = []
+        for instructors, rooms in zip(self._lecture_instructors, self._lecture_rooms):
+            instructor_domain = 0
+            for instructor in instructors:
+                instructor_domain |= self.instructor_masks[instructor]
+            room_domain = 0
+            for room in rooms:
+                room_domain |= self.room_masks[room]
+            self.domains.append(instructor_domain & room_domain)
+
+    def _index_resources(self, masks):
+        """Get the instructors or rooms that can be used for each lecture."""
+        resources = [[] for _ in self.lectures]
+        for resource in masks:
+            for lecture in resource.lectures:
+                lecture_id = self.lecture_ids.get(lecture)
+                if lecture_id is not None:
+                    resources[lecture_id].append(resource)
+        return resources
+
+    @staticmethod
+    def _to_masks(indices):
+        return {key: bitset(key_indices) for key, key_indices in indices.items()}
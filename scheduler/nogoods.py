@@ -0,0 +1,93 @@
+"""
+Learned nogoods.
+"""
+from collections import deque
+from scheduler.exceptions import ImpossibleAssignments
+from scheduler.propagation import Propagator
+from scheduler.helper import bit
+
+
+class NogoodPropagator(Propagator):
+    """
+    Learned combinations of (lecture, value index) pairs that cannot all hold.
+    Once all but one hold, the last value is removed. Like in SAT solvers
+    only two pairs of each nogood are watched. The oldest nogoods are
+    forgotten beyond max_nogoods.
+    """
+    def __init__(self, max_nogoods=1000):
+        """
+        Constructor
+        """
+        self._max_nogoods = max_nogoods
+        self._nogoods = deque()
+        # Maps each pair to the nogoods that watch it. The watched pairs
+        # are the first two of a nogood.
+        self._watches = {}
+
+    def __len__(self):
+        return len(self._nogoods)
+
+    def add(self, nogood):
+        """
+        Learn a nogood given as (lecture, value index) pairs. The pairs that
+        are undone first by backtracking should come first.
+        """
+        nogood = list(nogood)
+        self._nogoods.append(nogood)
+        for literal in nogood[:2]:
+            self._watches.setdefault(literal, []).append(nogood)
+        if len(self._nogoods) > self._max_nogoods:
+            # Forgotten nogoods are emptied and dropped from the watches
+            # when they are visited the next time.
+            del self._nogoods.popleft()[:]
+
+    def on_assign(self, engine, state, lecture, index):
+        literal = (lecture, index)
+        watching = self._watches.get(literal)
+        if not watching:
+            return
+        assigned = state.assigned
+        kept = 0
+        position = 0
+        try:
+            while position < len(watching):
+                nogood = watching[position]
+                position += 1
+                if not nogood:
+                    continue
+                if nogood[0] != literal:
+                    nogood[0], nogood[1] = nogood[1], nogood[0]
+                for other in range(2, len(nogood)):
+                    other_lecture, value = nogood[other]
+                    if assigned[other_lecture] != value:
+                        # Watch a pair that does not hold instead.
+                        nogood[0], nogood[other] = nogood[other], nogood[0]
+                        self._watches.setdefault(nogood[0], []).append(nogood)
+                        break
+                else:
+                    watching[kept] = nogood
+                    kept += 1
+                    self._propagate(engine, state, nogood)
+        finally:
+            del watching[kept:position]
+
+    @staticmethod
+    def _propagate(engine, state, nogood):
+        """
+        Remove the value of the second watched pair if all other pairs hold,
+        or fail if that one holds as well.
+        """
+        reason = 0
+        for lecture, _ in nogood[:1] + nogood[2:]:
+            reason |= state.reasons[lecture]
+        if len(nogood) > 1:
+            lecture, value = nogood[1]
+            assigned = state.assigned[lecture]
+            if assigned != value:
+                domain = state.domains[lecture]
+                if assigned is None and domain >> value & 1:
+                    engine.restrict(state, lecture, domain & ~bit(value), reason)
+                return
+            reason |= state.reasons[lecture]
+        raise ImpossibleAssignments('Assignments match a learned nogood.',
+                                    conflict=reason)
@@ -0,0 +1,62 @@
+"""
+Options of the search for a schedule.
+"""
+
+
+class SearchOptions():
+    """
+    How Timetable.find_schedule searches. Its budget is given separately.
+    """
+    def __init__(self, lcv='batched', restarts=None, seed=None, restart_scale=100,
+                 backjumping=True, table_size=None, break_symmetries=True,
+                 method='backtracking', workers=None, decompose=False):
+        """
+        Constructor
+
+        Args:
+            lcv (str): 'batched' scores the values of a domain at once, 'trial'
+                assigns each of them and also sees learned nogoods. With None
+                values keep their order, or are shuffled with restarts.
+            restarts (str): 'luby' or 'geometric' to restart with dom/wdeg at
+                growing numbers of failures.
+            seed (int): The seed of restarts and of the local search.
+            restart_scale (int): The number of failures of the first run.
+            backjumping (bool): Whether to backjump and learn nogoods rather
+                than backtrack chronologically.
+            table_size (int): The size of a transposition table of failed
+                states, if any.
+            break_symmetries (bool): Whether to refute the images of failed
+                values under swaps of interchangeable values.
+            method (str): 'backtracking', or 'local' for a min-conflicts search
+                that cannot prove infeasibility and only uses the seed.
+            workers (int): The number of processes of a portfolio, or of the
+                components with decompose.
+            decompose (bool): Whether to schedule independent components of the
+                lectures separately.
+
+        Raises:
+            ValueError: If an option has an unknown value.
+        """
+        if lcv not in ('batched', 'trial', None):
+            raise ValueError('Unknown least-constraining-value mode %s.' % lcv)
+        if workers is not None and workers < 1:
+            raise ValueError('The number of workers has to be positive.')
+        if method not in ('backtracking', 'local'):
+            raise ValueError('Unknown search method %s.' % method)
+        self.lcv = lcv
+        self.restarts = restarts
+        self.seed = seed
+        self.restart_scale = restart_scale
+        self.backjumping = backjumping
+        self.table_size = table_size
+        self.break_symmetries = break_symmetries
+        self.method = method
+        self.workers = workers
+        self.decompose = decompose
+
+    def replace(self, **changes):
+        """Get a copy with some options changed."""
+        return SearchOptions(**dict(vars(self), **changes))
+
+    def __repr__(self):
+        return '<SearchOptions {}>'.format(vars(self))
@@ -0,0 +1,89 @@
+"""
+Portfolio of differently configured searches that run in parallel.
+"""
+import random
+
+
+# Pairs of restart schedule and least-constraining-value mode that the
+# portfolio cycles through after the configuration given by the caller.
+_VARIANTS = [('luby', 'batched'), ('geometric', None), (None, None),
+             ('luby', None), ('geometric', 'batched')]
+
+# The timetable of a worker process, set once by the initializer of the pool.
+_timetable = None
+
+
+def portfolio_configurations(n, options):
+    """
+    Get n diverse search options, starting with the given ones. The others
+    vary the restarts, the value ordering and the seed.
+    """
+    rng = random.Random(options.seed)
+    configurations = [options]
+    variant = 0
+    while len(configurations) < n:
+        variant_restarts, variant_lcv = _VARIANTS[variant % len(_VARIANTS)]
+        variant += 1
+        if variant_restarts is None and variant > len(_VARIANTS):
+            # Without restarts the search does not depend on the seed.
+            continue
+        configurations.append(options.replace(lcv=variant_lcv, restarts=variant_restarts,
+                                              seed=rng.randrange(2**32)))
+    return configurations
+
+
+def solve_portfolio(timetable, configurations, budget):
+    """
+    Run one search per configuration, each in its own process, until one of
+    them finds a schedule or proves that there is none.
+
+    Args:
+        timetable (Timetable): The timetable, sent to every worker once.
+        configurations (list): The SearchOptions of the searches.
+        budget (dict): The timeout, node limit and memory limit of each.
+
+    Returns:
+        The reason the portfolio stopped, the assigned values like
+        Timetable._solve and the stats of that search. If all budgets ran
+        out, the largest partial schedule.
+    """
+    # Only needed for parallel searches and slow to import.
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    import multiprocessing
+    context = multiprocessing.get_context()
+    stop = context.Event()
+    best = None
+    with ProcessPoolExecutor(len(configurations), mp_context=context,
+                             initializer=_init_worker,
+                             initargs=(timetable, stop)) as executor:
+        futures = [executor.submit(_run_configuration, configuration, budget)
+                   for configuration in configurations]
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                reason, assigned, _ = result
+                if reason in ('solved', 'infeasible'):
+                    return result
+                if best is None or _n_assigned(assigned) > _n_assigned(best[1]):
+                    best = result
+        finally:
+            stop.set()
+            for future in futures:
+                future.cancel()
+    return best
+
+
+def _n_assigned(assigned):
+    return len(assigned) - assigned.count(None)
+
+
+def _init_worker(timetable, stop):
+    global _timetable
+    _timetable = timetable
+    _timetable._should_stop = stop.is_set
+
+
+def _run_configuration(configuration, budget):
+    """Search in a worker process."""
+    reason, assigned = _timetable._solve(configuration, **budget)
+    return reason, assigned, _timetable.stats
@@ -0,0 +1,221 @@
+"""
+Queue driven constraint propagation.
+"""
+from collections import deque
+import time
+from scheduler.exceptions import ImpossibleAssignments
+from scheduler.helper import count_bits, lowest_bit
+
+
+class Propagator():
+    """
+    A constraint that removes values from the domains of lectures. Its hooks
+    are called for every changed lecture, and expensive constraints can
+    schedule themselves to run in propagate() once the queue is empty.
+    """
+    def on_assign(self, engine, state, lecture, index):
+        """React to a lecture having been assigned the value with the given index."""
+        pass
+
+    def on_domain_change(self, engine, state, lecture):
+        """React to the domain of a lecture having been reduced."""
+        pass
+
+    def propagate(self, engine, state):
+        """Run the scheduled part of the constraint once the queue is empty."""
+        pass
+
+
+class ConflictPropagator(Propagator):
+    """
+    Remove values from other domains if they contain the same instructor or
+    the same room at the same time as an assigned value.
+    """
+    def __init__(self, model):
+        """
+        Constructor
+        """
+        self._model = model
+
+    def on_assign(self, engine, state, lecture, index):
+        engine.remove_from(state, self._model.conflicting_lectures(index),
+                           self._model.conflict_mask(index))
+
+
+class InstructorLoadPropagator(Propagator):
+    """
+    Remove values from other domains if they contain an instructor that
+    already gives the maximum number of lectures. The loads are counted
+    incrementally by the search state.
+    """
+    def __init__(self, model, max_lectures_per_instructor):
+        """
+        Constructor
+        """
+        self._model = model
+        self._max_lectures_per_instructor = max_lectures_per_instructor
+
+    def on_assign(self, engine, state, lecture, index):
+        model = self._model
+        instructor_id = model.assignment_instructors[index]
+        if state.instructor_loads[instructor_id] >= self._max_lectures_per_instructor:
+            instructor = model.assignments[index].instructor
+            lectures = model.instructor_lectures(instructor)
+            reason = None
+            if engine.explain:
+                # The load depends on every lecture given by the instructor.
+                reason = 0
+                for other in lectures:
+                    assigned = state.assigned[other]
+                    if (assigned is not None and 
+                        model.assignment_instructors[assigned] == instructor_id):
+                        reason |= state.reasons[other]
+            engine.remove_from(state, lectures, model.instructor_masks[instructor],
+                               reason)
+
+
+class PropagationEngine():
+    """
+    Propagate constraints with a worklist of changed lectures, similar to
+    AC-3. Lectures whose domain shrinks to a single value are assigned it.
+    If explain is set, every removal records the decision levels that caused
+    it, as backjumping needs.
+    """
+    def __init__(self, propagators=()):
+        """
+        Constructor
+        """
+        self._propagators = list(propagators)
+        self._queue = deque()
+        self._queued = set()
+        self._scheduled = deque()
+        self.explain = False
+        # The bitset of the levels that currently hold a decision, set by
+        # the search.
+        self.decision_levels = 0
+        self._cause = 0
+        # SearchStats that count propagation calls and pruned values while
+        # profiling.
+        self.stats = None
+
+    @property
+    def propagators(self):
+        return self._propagators
+
+    def add_propagator(self, propagator):
+        """Add a constraint that is notified about changed lectures."""
+        self._propagators.append(propagator)
+
+    def remove_propagator(self, propagator):
+        """Remove a constraint that has been added before."""
+        self._propagators.remove(propagator)
+
+    def assign(self, state, lecture, index, reason=None):
+        """
+        Assign a value to a lecture and queue it for propagation. The reason
+        replaces the one of the lecture, e.g. the level of a decision.
+        """
+        if self.explain and reason is not None:
+            state.set_item(state.reasons, lecture, reason)
+        state.assign(lecture, index)
+        self._enqueue(lecture)
+
+    def schedule(self, propagator):
+        """Run a propagator once the queue of changed lectures is empty."""
+        if propagator not in self._scheduled:
+            self._scheduled.append(propagator)
+
+    def restrict(self, state, lecture, domain, reason=None):
+        """
+        Replace the domain of an unassigned lecture by a subset of it.
+
+        Raises:
+            ImpossibleAssignments: If the domain becomes empty.
+        """
+        if domain == state.domains[lecture]:
+            return
+        if self.stats is not None:
+            self.stats.n_pruned += count_bits(state.domains[lecture] & ~domain)
+        if self.explain:
+            old_reason = state.reasons[lecture]
+            reason = old_reason | (self._cause if reason is None else reason)
+            if not domain:
+                raise ImpossibleAssignments('Assignment leads to inconsistencies.', 
+                                            (lecture,), reason)
+            if reason != old_reason:
+                state.set_item(state.reasons, lecture, reason)
+        elif not domain:
+            raise ImpossibleAssignments('Assignment leads to inconsistencies.', (lecture,))
+        state.set_domain(lecture, domain)
+        self._enqueue(lecture)
+
+    def remove_from(self, state, lectures, mask, reason=None):
+        """Remove a bitset of values from the domains of unassigned lectures."""
+        domains = state.domains
+        for lecture in lectures:
+            if domains[lecture] & mask and not state.is_assigned(lecture):
+                self.restrict(state, lecture, domains[lecture] & ~mask, reason)
+
+    def propagate(self, state, lectures=()):
+        """
+        Process queued lectures, and the given ones, until no domain changes.
+
+        Raises:
+            ImpossibleAssignments: If a domain becomes empty. The caller has to
+                restore the state.
+        """
+        for lecture in lectures:
+            self._enqueue(lecture)
+        stats = self.stats
+        if stats is not None:
+            stats.n_propagations += 1
+            start = time.perf_counter()
+        try:
+            while self._queue or self._scheduled:
+                while self._queue:
+                    lecture = self._queue.popleft()
+                    self._queued.discard(lecture)
+                    self._notify(state, lecture)
+                if self._scheduled:
+                    self._cause = self.decision_levels
+                    self._scheduled.popleft().propagate(self, state)
+        finally:
+            self._clear()
+            if stats is not None:
+                stats.add_time('propagation', time.perf_counter() - start)
+
+    def reduce(self, state, lecture, index):
+        """
+        Assign a value to a lecture and only apply its direct consequences
+        without propagating them further or running scheduled propagators.
+        """
+        state.assign(lecture, index)
+        try:
+            for propagator in self._propagators:
+                propagator.on_assign(self, state, lecture, index)
+        finally:
+            self._clear()
+
+    def _notify(self, state, lecture):
+        """Call the propagators for a changed lecture."""
+        self._cause = state.reasons[lecture]
+        if not state.is_assigned(lecture):
+            domain = state.domains[lecture]
+            if count_bits(domain) == 1:
+                state.assign(lecture, lowest_bit(domain))
+        if state.is_assigned(lecture):
+            index = state.assigned[lecture]
+            for propagator in self._propagators:
+                propagator.on_assign(self, state, lecture, index)
+        for propagator in self._propagators:
+            propagator.on_domain_change(self, state, lecture)
+
+    def _enqueue(self, lecture):
+        if lecture not in self._queued:
+            self._queued.add(lecture)
+            self._queue.append(lecture)
+
+    def _clear(self):
+        self._queue.clear()
+        self._queued.clear()
+        self._scheduled.clear()
@@ -0,0 +1,110 @@
+"""
+Immutable value types that are interned per timetable.
+"""
+import copy
+
+
+# Bypasses the immutability of the values while they are set up.
+_setattr = object.__setattr__
+
+
+class InternedValue():
+    """
+    Base of the immutable value types of a timetable, which are equal if
+    their _key is. A ValueRegistry hands out one object with an integer id
+    for all equal values.
+    """
+    __slots__ = ('_hash', '_id', '_registry')
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        _setattr(self, '_hash', hash(self._key))
+        _setattr(self, '_id', None)
+        _setattr(self, '_registry', None)
+
+    @property
+    def id(self):
+        """The number of the value within its registry, None if not interned."""
+        return self._id
+
+    def _set(self, name, value):
+        _setattr(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('%s is immutable.' % type(self).__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError('%s is immutable.' % type(self).__name__)
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if type(other) is not type(self):
+            return NotImplemented
+        if self._registry is not None and self._registry is other._registry:
+            return self._id == other._id
+        return self._key == other._key
+
+    def __hash__(self):
+        return self._hash
+
+    def __getstate__(self):
+        # Hashes of strings differ between processes, so the hash is not
+        # part of the state. The registry links its values again when it is
+        # unpickled itself, otherwise a value would contain itself.
+        return {slot: getattr(self, slot) for cls in type(self).__mro__
+                for slot in getattr(cls, '__slots__', ()) if slot not in ('_hash', '_registry')}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            self._set(name, value)
+        self._set('_hash', hash(self._key))
+        self._set('_registry', None)
+
+
+class ValueRegistry():
+    """
+    Interns the instructors, rooms, timeslots and assignments of a timetable,
+    so that each distinct value exists once and is numbered by its type.
+    """
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._values = {}
+        self._counts = {}
+
+    def intern(self, value):
+        """
+        Get the registered value that is equal to the given one, registering
+        the given one if there is none yet.
+        """
+        registered = self._values.get(value)
+        if registered is not None:
+            return registered
+        if value._registry is not None:
+            value = copy.copy(value)
+        count = self._counts.get(type(value), 0)
+        _setattr(value, '_id', count)
+        _setattr(value, '_registry', self)
+        self._counts[type(value)] = count + 1
+        self._values[value] = value
+        return value
+
+    def __contains__(self, value):
+        return value in self._values
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getstate__(self):
+        return {'values': list(self._values), 'counts': self._counts}
+
+    def __setstate__(self, state):
+        self._values = {}
+        for value in state['values']:
+            _setattr(value, '_registry', self)
+            self._values[value] = value
+        self._counts = state['counts']
@@ -0,0 +1,107 @@
+"""
+Changes of a timetabling problem and the neighbourhoods of their repair.
+"""
+
+
+class ScheduleChange():
+    """
+    A change of the lectures, instructors, rooms or timeslots of a timetable,
+    in the form of its constructor. An instructor or room with a known name
+    or number replaces the old one.
+    """
+    def __init__(self, add_lectures=(), remove_lectures=(), instructors=(),
+                 remove_instructors=(), rooms=(), remove_rooms=(),
+                 add_timeslots=(), remove_timeslots=()):
+        """
+        Constructor
+
+        Args:
+            remove_lectures (list): Lectures that are dropped, also from all
+                instructors and rooms.
+            instructors (list): Instructor specifications that are added or
+                replace the ones with the same name.
+            rooms (list): Room specifications that are added or replace the
+                ones with the same number.
+            add_timeslots (list): New timeslots like 'Mon 8-10'.
+        """
+        self.add_lectures = list(add_lectures)
+        self.remove_lectures = list(remove_lectures)
+        self.instructors = list(instructors)
+        self.remove_instructors = list(remove_instructors)
+        self.rooms = list(rooms)
+        self.remove_rooms = list(remove_rooms)
+        self.add_timeslots = list(add_timeslots)
+        self.remove_timeslots = list(remove_timeslots)
+
+    def apply(self, lecture_list, instructor_list, room_list, timeslot_list):
+        """
+        Get the specification lists of the changed problem. The given lists
+        are not modified.
+
+        Returns:
+            The lists of lectures, instructors, rooms and timeslots.
+        """
+        removed_lectures = set(self.remove_lectures)
+        lectures = [lecture for lecture in lecture_list if lecture not in removed_lectures]
+        lectures += [lecture for lecture in self.add_lectures if lecture not in lectures]
+        instructors = self._replace(instructor_list, self.instructors,
+                                    self.remove_instructors, removed_lectures)
+        rooms = self._replace(room_list, self.rooms, self.remove_rooms, removed_lectures)
+        removed_timeslots = {self._parse_timeslot(timeslot) for timeslot in self.remove_timeslots}
+        timeslots = [timeslot for timeslot in timeslot_list
+                     if self._parse_timeslot(timeslot) not in removed_timeslots]
+        timeslots += self.add_timeslots
+        return lectures, instructors, rooms, timeslots
+
+    @staticmethod
+    def _replace(specs, changed, removed, removed_lectures):
+        """Replace, add and remove instructor or room specifications."""
+        changed = {spec[0]: spec for spec in changed}
+        removed = set(removed)
+        result = []
+        for spec in specs:
+            key = spec[0]
+            if key in removed:
+                continue
+            result.append(changed.pop(key, spec))
+        result += changed.values()
+        return [[spec[0], [lecture for lecture in spec[1] if lecture not in removed_lectures],
+                 spec[2], spec[3]] for spec in result]
+
+    @staticmethod
+    def _parse_timeslot(timeslot):
+        """Get the day, start and end of a timeslot specification."""
+        day, start_end = timeslot.split()
+        return (day,) + tuple(start_end.split('-'))
+
+    def __repr__(self):
+        return '<ScheduleChange {}>'.format(
+            {name: value for name, value in vars(self).items() if value})
+
+
+def find_neighbours(lectures, schedule, instructors, rooms, max_lectures_per_instructor):
+    """
+    Get the scheduled lectures, other than the given ones, that use an
+    instructor or a room at a time one of the lectures could use it, or fill
+    up the load of an instructor who could give it.
+    """
+    lectures = set(lectures)
+    users = {}
+    loads = {}
+    for lecture, assignment in schedule.items():
+        users[assignment.instructor, assignment.timeslot] = lecture
+        users[assignment.room, assignment.timeslot] = lecture
+        loads.setdefault(assignment.instructor, []).append(lecture)
+
+    neighbours = set()
+    for resource in instructors + rooms:
+        if not lectures.intersection(resource.lectures):
+            continue
+        for timeslot in resource.timeslots:
+            user = users.get((resource, timeslot))
+            if user is not None:
+                neighbours.add(user)
+        given = loads.get(resource, ())
+        if len(given) >= max_lectures_per_instructor:
+            neighbours.update(given)
+    return neighbours - lectures
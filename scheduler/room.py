@@ -1,15 +1,33 @@
+from scheduler.registry import InternedValue
 
-class Room():
+
+class Room(InternedValue):
     """
-    A room to give lectures in.
+    A room to give lectures in. Rooms are identified by their number.
     """
+    __slots__ = ('_key', '_lectures', '_timeslots')
+
     def __init__(self, number, lectures, timeslots):
         """
         Constructor
         """
-        self.number = number
-        self._lectures = lectures
-        self._timeslots = timeslots
+        self._set('_key', number)
+        # Sets, so that the checks below take constant time.
+        self._set('_lectures', frozenset(lectures))
+        self._set('_timeslots', frozenset(timeslots))
+        super().__init__()
+
+    @property
+    def number(self):
+        return self._key
+
+    @property
+    def lectures(self):
+        return self._lectures
+
+    @property
+    def timeslots(self):
+        return self._timeslots
         
     def can_be_used_for(self, lecture):
         """
@@ -24,13 +42,7 @@ class Room():
         return timeslot in self._timeslots    
     
     def __repr__(self):
-        return '<Room No.{}>'.format(self.number)
+        return '<Room No.{}>'.format(self._key)
     
     def __str__(self):
-        return 'No.{}'.format(self.number)
-    
-    def __eq__(self, other):
-        return self.number == other.number
-    
-    def __hash__(self):
-        return hash(self.number)
\ No newline at end of file
+        return 'No.{}'.format(self._key)
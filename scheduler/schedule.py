@@ -0,0 +1,123 @@
+"""
+Compact, immutable result of a search.
+"""
+from collections.abc import Mapping
+from scheduler.instructor import Instructor
+from scheduler.room import Room
+from scheduler.timeslot import Timeslot
+from scheduler.helper import format_for_print
+
+
+COLUMNS = ('Lecture', 'Time', 'Instructor', 'Room')
+# The order of the days when sorting by time. Other days come last.
+DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+
+def _identifier(value):
+    """Get the name of an instructor, the number of a room or the text of a timeslot."""
+    if isinstance(value, Instructor):
+        return value.name
+    if isinstance(value, Room):
+        return value.number
+    if isinstance(value, Timeslot):
+        return str(value)
+    return value
+
+
+def timeslot_order(timeslot):
+    """Get a key that sorts timeslots by day and start time."""
+    day = DAYS.index(timeslot.day) if timeslot.day in DAYS else len(DAYS)
+    start = int(timeslot.start) if timeslot.start.isdigit() else float('inf')
+    return (day, timeslot.day, start, timeslot.start)
+
+
+class Schedule(Mapping):
+    """
+    An immutable mapping of lectures to assignments, whose lectures can also
+    be selected by timeslot, room or instructor.
+    """
+    __slots__ = ('_lectures', '_assignments', '_positions', '_indices')
+
+    def __init__(self, items=()):
+        """
+        Constructor
+
+        Args:
+            items: A mapping or (lecture, assignment) pairs.
+        """
+        if isinstance(items, Mapping):
+            items = items.items()
+        pairs = tuple(items)
+        self._lectures = tuple(lecture for lecture, _ in pairs)
+        self._assignments = tuple(assignment for _, assignment in pairs)
+        self._positions = None
+        self._indices = {}
+
+    def __getitem__(self, lecture):
+        if self._positions is None:
+            self._positions = {lecture: i for i, lecture in enumerate(self._lectures)}
+        return self._assignments[self._positions[lecture]]
+
+    def __iter__(self):
+        return iter(self._lectures)
+
+    def __len__(self):
+        return len(self._lectures)
+
+    def at(self, timeslot):
+        """Get the lectures at a timeslot, e.g. 'Mon 8-10'."""
+        return self._select('timeslot', timeslot)
+
+    def in_room(self, room):
+        """Get the lectures in a room, given as room or number."""
+        return self._select('room', room)
+
+    def given_by(self, instructor):
+        """Get the lectures of an instructor, given as instructor or name."""
+        return self._select('instructor', instructor)
+
+    def sorted(self, by='time'):
+        """
+        Get the (lecture, assignment) pairs sorted by 'lecture', 'time',
+        'instructor' or 'room'. Ties keep their order.
+        """
+        keys = {'lecture': lambda pair: str(pair[0]),
+                'time': lambda pair: timeslot_order(pair[1].timeslot),
+                'instructor': lambda pair: str(pair[1].instructor),
+                'room': lambda pair: str(pair[1].room)}
+        if by not in keys:
+            raise ValueError('Unknown sort key %s.' % by)
+        return sorted(self.items(), key=keys[by])
+
+    def rows(self, by='time'):
+        """Get the lecture, time, instructor and room of each lecture as text."""
+        return [(str(lecture), str(assignment.timeslot), str(assignment.instructor),
+                 str(assignment.room))
+                for lecture, assignment in self.sorted(by)]
+
+    def to_dataframe(self, by='time'):
+        """Get the rows as a pandas DataFrame, which requires pandas."""
+        from pandas import DataFrame
+        return DataFrame(self.rows(by), columns=list(COLUMNS))
+
+    def to_table(self, by='time'):
+        """
+        Get the rows as a table for printing, drawn by prettytable if it is
+        installed.
+        """
+        return format_for_print(COLUMNS, self.rows(by))
+
+    def _select(self, attribute, value):
+        """Get the lectures whose assignment has a certain attribute value."""
+        index = self._indices.get(attribute)
+        if index is None:
+            index = {}
+            for position, assignment in enumerate(self._assignments):
+                key = _identifier(getattr(assignment, attribute))
+                index.setdefault(key, []).append(position)
+            self._indices[attribute] = index
+        return Schedule((self._lectures[position], self._assignments[position])
+                        for position in index.get(_identifier(value), ()))
+
+    def __repr__(self):
+        return '<Schedule of {} lectures>'.format(len(self))
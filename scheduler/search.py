@@ -0,0 +1,272 @@
+"""
+Iterative backtracking search.
+"""
+from scheduler.exceptions import ImpossibleAssignments, SearchLimitReached
+from scheduler.helper import bit
+
+
+class BacktrackingSearch():
+    """
+    Depth-first search that branches on one lecture per node, with the open
+    nodes on an explicit stack instead of recursion.
+
+    Every failure comes with the bitset of the decision levels that caused
+    it, and the search backtracks to the deepest of them. Without nogoods
+    the engine does not explain its removals, so all levels are blamed,
+    which is chronological backtracking. States found in the transposition
+    table and the symmetric images of refuted values fail as well.
+    """
+    def __init__(self, engine, select_lecture, order_values, on_node=None,
+                 on_failure=None, nogoods=None, should_stop=None, table=None,
+                 symmetries=None):
+        """
+        Constructor
+
+        Args:
+            engine (PropagationEngine): Propagates every assignment.
+            select_lecture (callable): Returns the lecture to branch on.
+            order_values (callable): Returns the indices of the values of a
+                lecture in the order they are tried.
+            on_node (callable): Called with the state at every node.
+            on_failure (callable): Called with the error of every failed value.
+            nogoods (NogoodPropagator): Enables backjumping and learns the
+                conflicts. It has to be a propagator of the engine.
+            should_stop (callable): Returns the reason to stop, if any.
+            table (TranspositionTable): Stores the refuted states.
+            symmetries (Symmetries): Gives the images of refuted values.
+        """
+        self._engine = engine
+        self._select_lecture = select_lecture
+        self._order_values = order_values
+        self._on_node = on_node
+        self._on_failure = on_failure
+        self._nogoods = nogoods
+        self._should_stop = should_stop
+        self._table = table
+        self._symmetries = symmetries
+        self._fail_limit = None
+        self.n_failures = 0
+        self.n_backjumps = 0
+
+    def solve(self, state, fail_limit=None):
+        """
+        Search a complete assignment, which is left in the state. Otherwise the
+        state is restored.
+
+        Raises:
+            ImpossibleAssignments: If no complete assignment exists.
+            SearchLimitReached: If the search has been stopped early.
+        """
+        self.n_failures = 0
+        self.n_backjumps = 0
+        self._fail_limit = fail_limit
+        engine = self._engine
+        engine.explain = self._nogoods is not None
+        engine.decision_levels = 0
+        depth = state.depth
+        try:
+            return next(self._search(state))
+        except SearchLimitReached:
+            while state.depth > depth:
+                state.undo()
+            raise
+        finally:
+            engine.explain = False
+            engine.decision_levels = 0
+
+    def iter_solutions(self, state):
+        """
+        Enumerate all complete assignments, keeping only the open nodes in
+        memory. Nogoods, tables and symmetries would refute solutions, so they
+        are not allowed. The state is restored at the end.
+
+        Yields:
+            The state with each complete assignment, which must not be changed
+            before the next one is requested.
+
+        Raises:
+            SearchLimitReached: If the search has been stopped early.
+        """
+        if (self._nogoods is not None or self._table is not None or 
+                self._symmetries is not None):
+            raise ValueError('Solutions cannot be enumerated with nogoods, a table or symmetries.')
+        self.n_failures = 0
+        self.n_backjumps = 0
+        self._fail_limit = None
+        engine = self._engine
+        engine.decision_levels = 0
+        depth = state.depth
+        try:
+            yield from self._search(state)
+        except ImpossibleAssignments:
+            # All branches have been explored.
+            return
+        finally:
+            while state.depth > depth:
+                state.undo()
+            engine.decision_levels = 0
+
+    def _search(self, state):
+        """
+        Run the search loop and yield the state at every solution. Once the
+        search is resumed, the solution is refuted.
+        """
+        # Each frame holds a lecture, the values to try and the position of
+        # the next one. A frame opens a level on the trail for the values
+        # refuted so far and another one for the value currently assigned.
+        # The frame at position i of the stack is decision level i + 1.
+        stack = []
+        conflict = None
+        while True:
+            if conflict is None:
+                if state.is_complete():
+                    yield state
+                    conflict = self._engine.decision_levels
+                    continue
+                if self._should_stop is not None:
+                    reason = self._should_stop()
+                    if reason:
+                        raise SearchLimitReached('The search has been stopped.', reason)
+                if self._on_node is not None:
+                    self._on_node(state)
+                lecture = self._select_lecture(state)
+                state.mark()
+                stack.append([lecture, self._order_values(lecture, state), 0])
+            else:
+                # The subtree below the value of the topmost frame failed.
+                level = conflict.bit_length() - 1
+                if level <= 0:
+                    while stack:
+                        self._abandon(state, stack)
+                    raise ImpossibleAssignments('No assignment could be found for any lecture at this point.')
+                if level < len(stack):
+                    self.n_backjumps += 1
+                    while len(stack) > level:
+                        self._abandon(state, stack)
+                if self._table is not None:
+                    self._table.add()
+                conflict = self._retract(state, stack, conflict)
+                if conflict is not None:
+                    continue
+            conflict = self._try_next_value(state, stack)
+
+    def _try_next_value(self, state, stack):
+        """
+        Assign the next value of the topmost frame that can be propagated.
+
+        Returns:
+            None if the search can descend, otherwise the conflict of the frame,
+            which has then been removed.
+        """
+        engine = self._engine
+        frame = stack[-1]
+        level = len(stack)
+        lecture, values = frame[0], frame[1]
+        while frame[2] < len(values):
+            index = values[frame[2]]
+            frame[2] += 1
+            if not state.domains[lecture] >> index & 1:
+                # The value has been removed while refuting other values.
+                continue
+            state.mark()
+            if state.is_assigned(lecture):
+                # Propagating the refutations left a single value.
+                return None
+            engine.decision_levels |= bit(level)
+            try:
+                engine.assign(state, lecture, index, bit(level))
+                engine.propagate(state)
+                if self._table is not None and self._table.is_refuted():
+                    raise ImpossibleAssignments('The state has already been refuted.')
+                return None
+            except ImpossibleAssignments as error:
+                conflict = self._get_conflict(error)
+                self._failed(error)
+            if not conflict >> level & 1:
+                # The failure does not depend on this lecture, so neither
+                # will the other values.
+                state.undo()
+                engine.decision_levels &= ~bit(level)
+                self._pop(state, stack)
+                return conflict
+            conflict = self._retract(state, stack, conflict)
+            if conflict is not None:
+                return conflict
+        # Only reached if the values were removed without a failure.
+        conflict = engine.decision_levels
+        self._pop(state, stack)
+        return conflict
+
+    def _retract(self, state, stack, conflict):
+        """
+        Undo the failed value of the topmost frame, learn its conflict and
+        remove the value from the domain.
+
+        Returns:
+            None if the frame can go on, otherwise its conflict like
+            _try_next_value.
+        """
+        engine = self._engine
+        level = len(stack)
+        lecture, values, position = stack[-1]
+        index = values[position - 1]
+        if self._nogoods is not None:
+            self._nogoods.add(self._get_nogood(state, stack, conflict))
+        state.undo()
+        engine.decision_levels &= ~bit(level)
+        try:
+            engine.restrict(state, lecture, state.domains[lecture] & ~bit(index),
+                            conflict & ~bit(level))
+            if self._symmetries is not None:
+                for image, image_index in self._symmetries.images(state, lecture, index):
+                    engine.remove_from(state, (image,), bit(image_index), 
+                                       engine.decision_levels)
+            engine.propagate(state)
+            return None
+        except ImpossibleAssignments as error:
+            conflict = self._get_conflict(error)
+            self._failed(error)
+        self._pop(state, stack)
+        return conflict
+
+    def _get_conflict(self, error):
+        """Get the levels to blame for a failure."""
+        if error.conflict is None:
+            return self._engine.decision_levels
+        return error.conflict
+
+    @staticmethod
+    def _get_nogood(state, stack, conflict):
+        """Get the decisions of the levels of a conflict, deepest first."""
+        nogood = []
+        level = 0
+        while conflict:
+            if conflict & 1:
+                lecture = stack[level - 1][0]
+                nogood.append((lecture, state.assigned[lecture]))
+            conflict >>= 1
+            level += 1
+        nogood.reverse()
+        return nogood
+
+    def _failed(self, error):
+        """Count a failure and stop once the limit is reached."""
+        self.n_failures += 1
+        if self._on_failure is not None:
+            self._on_failure(error)
+        if self._fail_limit is not None and self.n_failures >= self._fail_limit:
+            raise SearchLimitReached('Reached the limit of %d failures.' % self._fail_limit,
+                                     'fail_limit')
+
+    def _abandon(self, state, stack):
+        """Remove a frame whose value is assigned together with that value."""
+        if self._table is not None:
+            self._table.add()
+        state.undo()
+        self._engine.decision_levels &= ~bit(len(stack))
+        self._pop(state, stack)
+
+    def _pop(self, state, stack):
+        """Remove an exhausted frame and undo its refutations."""
+        stack.pop()
+        state.undo()
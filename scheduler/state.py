@@ -0,0 +1,106 @@
+"""
+Mutable search state that can be rolled back through a trail.
+"""
+from scheduler.helper import bit
+
+
+class SearchState():
+    """
+    The domains and assigned values of the variables of a compiled model.
+    Every change is recorded on a trail, so that undo() restores the state
+    of the matching mark() instead of copying it at every node.
+    """
+    def __init__(self, model):
+        """
+        Constructor
+        """
+        self.model = model
+        self.domains = list(model.domains)
+        # The index of the assigned value of each lecture or None.
+        self.assigned = [None] * model.n_variables
+        self.n_assigned = 0
+        # The number of assigned lectures given by each instructor.
+        self.instructor_loads = [0] * len(model.instructors)
+        # The decision levels that are responsible for the values removed
+        # from the domain of each lecture, as a bitset. Only maintained if
+        # the engine explains its removals.
+        self.reasons = [0] * model.n_variables
+        self._trail = []
+        self._marks = []
+        self._listeners = []
+
+    @property
+    def depth(self):
+        """The number of currently open levels."""
+        return len(self._marks)
+
+    def add_listener(self, listener):
+        """
+        Register an object that is told about every change of a domain or 
+        assignment, including the ones made by undo(). It has to implement
+        domain_changed(lecture, domain), assigned(lecture) and 
+        unassigned(lecture).
+        """
+        self._listeners.append(listener)
+
+    def mark(self):
+        """Open a new level that can be undone later."""
+        self._marks.append(len(self._trail))
+
+    def undo(self):
+        """Restore the state as it was when the last level was opened."""
+        position = self._marks.pop()
+        trail = self._trail
+        listeners = self._listeners
+        while len(trail) > position:
+            container, key, old = trail.pop()
+            container[key] = old
+            if container is self.domains:
+                for listener in listeners:
+                    listener.domain_changed(key, old)
+            elif container is self.assigned:
+                self.n_assigned -= 1
+                for listener in listeners:
+                    listener.unassigned(key)
+
+    def set_domain(self, lecture, domain):
+        """Replace the domain of a lecture."""
+        old = self.domains[lecture]
+        if old != domain:
+            self._trail.append((self.domains, lecture, old))
+            self.domains[lecture] = domain
+            for listener in self._listeners:
+                listener.domain_changed(lecture, domain)
+
+    def set_item(self, container, key, value):
+        """Set an item of a list or dictionary belonging to the state."""
+        self._trail.append((container, key, container[key]))
+        container[key] = value
+
+    def assign(self, lecture, index):
+        """Assign the value with the given index to a lecture."""
+        self.set_domain(lecture, bit(index))
+        self._trail.append((self.assigned, lecture, self.assigned[lecture]))
+        self.assigned[lecture] = index
+        self.n_assigned += 1
+        for listener in self._listeners:
+            listener.assigned(lecture)
+        self._count_load(lecture, index)
+
+    def _count_load(self, lecture, index):
+        """Increase the load of the instructor of an assigned value."""
+        instructor = self.model.assignment_instructors[index]
+        self.set_item(self.instructor_loads, instructor, 
+                      self.instructor_loads[instructor] + 1)
+
+    def is_assigned(self, lecture):
+        return self.assigned[lecture] is not None
+
+    def is_complete(self):
+        """Check whether every lecture has been assigned a value."""
+        return self.n_assigned == len(self.assigned)
+
+    def unassigned(self):
+        """Get all lectures that have not yet been assigned a value."""
+        return [lecture for lecture, index in enumerate(self.assigned)
+                if index is None]
@@ -0,0 +1,111 @@
+"""
+Statistics and progress events of the search.
+"""
+from contextlib import contextmanager
+import time
+
+
+class SearchStats():
+    """
+    Counters and timers of a search, with times in seconds. Propagation calls,
+    pruned values and the time of propagation and value ordering are only
+    measured when profiling, since they are updated in the innermost loops.
+    """
+    COUNTERS = ('n_nodes', 'n_backtracks', 'n_wipeouts', 'n_backjumps',
+                'n_restarts', 'n_propagations', 'n_pruned', 'n_table_hits',
+                'n_table_misses')
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        self.times = {}
+
+    def add_time(self, phase, seconds):
+        self.times[phase] = self.times.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, phase):
+        """Add the time spent in a with block to a phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - start)
+
+    def add(self, other):
+        """Add the counters and times of another search."""
+        for name in self.COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for phase, seconds in other.times.items():
+            self.add_time(phase, seconds)
+
+    def as_dict(self):
+        """Get all counters and times as a dictionary."""
+        stats = {name: getattr(self, name) for name in self.COUNTERS}
+        stats['times'] = dict(self.times)
+        return stats
+
+    def __repr__(self):
+        return '<SearchStats {}>'.format(self.as_dict())
+
+
+class SearchObserver():
+    """
+    Receives progress events of the backtracking search. With several
+    workers, the observers run in the worker processes.
+    """
+    def on_start(self, stats):
+        """Called before the search starts."""
+        pass
+
+    def on_node(self, state, stats):
+        """Called at every node of the search with the current state."""
+        pass
+
+    def on_failure(self, error, stats):
+        """Called with the ImpossibleAssignments error of every failed value."""
+        pass
+
+    def on_restart(self, stats):
+        """Called whenever the search is restarted."""
+        pass
+
+    def on_finish(self, stop_reason, stats):
+        """Called once the search has stopped."""
+        pass
+
+
+class PrintingObserver(SearchObserver):
+    """Print the progress of the search at a fixed interval."""
+    def __init__(self, interval=10, file=None):
+        """
+        Constructor
+
+        Args:
+            interval (float): Seconds between two reports.
+            file: Where to print to, standard output by default.
+        """
+        self._interval = interval
+        self._file = file
+        self._start = None
+        self._next_report = None
+
+    def on_start(self, stats):
+        self._start = time.monotonic()
+        self._next_report = self._start + self._interval
+
+    def on_node(self, state, stats):
+        now = time.monotonic()
+        if now >= self._next_report:
+            self._next_report = now + self._interval
+            print('{:.0f}s: {} nodes, {} backtracks, {} of {} lectures assigned'.format(
+                now - self._start, stats.n_nodes, stats.n_backtracks,
+                state.n_assigned, len(state.assigned)), file=self._file)
+
+    def on_finish(self, stop_reason, stats):
+        print('Stopped after {:.1f}s ({}): {} nodes, {} backtracks'.format(
+            time.monotonic() - self._start, stop_reason, stats.n_nodes,
+            stats.n_backtracks), file=self._file)
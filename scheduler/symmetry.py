@@ -0,0 +1,139 @@
+"""
+Interchangeable lectures, instructors, rooms and timeslots.
+"""
+from scheduler.assignment import Assignment
+from scheduler.factorized import FactorizedModel, INSTRUCTOR, ROOM, TIMESLOT
+
+
+def interchangeable(values, key):
+    """
+    Group values whose keys are equal.
+
+    Returns:
+        A dictionary mapping every value that has an equal one to the other
+        values of its class.
+    """
+    classes = {}
+    for value in values:
+        classes.setdefault(key(value), []).append(value)
+    return {value: [other for other in members if other is not value]
+            for members in classes.values() if len(members) > 1
+            for value in members}
+
+
+class Symmetries():
+    """
+    Swaps of interchangeable lectures, instructors, rooms or timeslots, which
+    can be used for the same things at the same times. A swap that leaves the
+    partial schedule as it is maps a refuted value onto another one that can
+    be refuted as well.
+    """
+    def __init__(self, model, lectures, instructors, rooms, timeslots):
+        """
+        Constructor
+
+        Args:
+            model (CompiledModel or FactorizedModel): The model to search.
+            lectures, instructors, rooms, timeslots (list): The values the
+                model has been compiled from.
+        """
+        self._model = model
+        self._factorized = isinstance(model, FactorizedModel)
+        lecture_set = set(lectures)
+        timeslot_set = set(timeslots)
+
+        def resource_key(resource):
+            return (resource.lectures & lecture_set, resource.timeslots & timeslot_set)
+
+        def timeslot_key(timeslot):
+            return (frozenset(instructor for instructor in instructors
+                              if instructor.can_teach_at(timeslot)),
+                    frozenset(room for room in rooms if room.can_be_used_at(timeslot)))
+
+        def lecture_key(lecture):
+            return (frozenset(instructor for instructor in instructors
+                              if instructor.can_teach(lecture)),
+                    frozenset(room for room in rooms if room.can_be_used_for(lecture)))
+
+        # The other values of the class of each value, by kind.
+        self._classes = [interchangeable(instructors, resource_key),
+                         interchangeable(rooms, resource_key),
+                         interchangeable(timeslots, timeslot_key)]
+        lecture_ids = model.lecture_ids
+        self._lecture_classes = {lecture_ids[lecture]: [lecture_ids[other] for other in others]
+                                 for lecture, others in interchangeable(lectures, lecture_key).items()}
+        if self._factorized:
+            self._positions = [{value: i for i, value in enumerate(values)}
+                               for values in (model.instructors, model.rooms, model.timeslots)]
+
+    def __bool__(self):
+        return bool(self._lecture_classes) or any(self._classes)
+
+    def images(self, state, variable, index):
+        """
+        Get the (variable, value index) pairs that are mapped onto a value
+        of a variable by a swap that leaves the assigned variables as they
+        are.
+        """
+        if self._factorized:
+            return self._factorized_images(state, variable, index)
+        model = self._model
+        assignment = model.assignments[index]
+        parts = [assignment.instructor, assignment.room, assignment.timeslot]
+        images = []
+        used = None
+        for kind, classes in enumerate(self._classes):
+            others = classes.get(parts[kind])
+            if not others:
+                continue
+            if used is None:
+                used = self._used_values(state)
+            if parts[kind] in used[kind]:
+                continue
+            for other in others:
+                if other not in used[kind]:
+                    image = list(parts)
+                    image[kind] = other
+                    image_index = model.index_of(Assignment(*image))
+                    if image_index is not None:
+                        images.append((variable, image_index))
+        for other in self._lecture_classes.get(variable, ()):
+            if not state.is_assigned(other):
+                images.append((other, index))
+        return images
+
+    def _factorized_images(self, state, variable, index):
+        """Get the images of a value of the factorized model, see images."""
+        model = self._model
+        lecture, kind = divmod(variable, 3)
+        value = (model.instructors, model.rooms, model.timeslots)[kind][index]
+        images = []
+        others = self._classes[kind].get(value)
+        if others:
+            used = self._used_values(state)[kind]
+            if value not in used:
+                images += [(variable, self._positions[kind][other]) for other in others
+                           if other not in used and other in self._positions[kind]]
+        if not any(state.is_assigned(own) for own in model.variables(lecture)):
+            for other in self._lecture_classes.get(lecture, ()):
+                if not any(state.is_assigned(own) for own in model.variables(other)):
+                    images.append((model.variable(other, kind), index))
+        return images
+
+    def _used_values(self, state):
+        """Get the instructors, rooms and timeslots of the assigned variables."""
+        used = [set(), set(), set()]
+        if self._factorized:
+            values = (self._model.instructors, self._model.rooms, self._model.timeslots)
+            for variable, index in enumerate(state.assigned):
+                if index is not None:
+                    kind = variable % 3
+                    used[kind].add(values[kind][index])
+        else:
+            for index in state.assigned:
+                if index is not None:
+                    assignment = self._model.assignments[index]
+                    used[INSTRUCTOR].add(assignment.instructor)
+                    used[ROOM].add(assignment.room)
+                    used[TIMESLOT].add(assignment.timeslot)
+        return used
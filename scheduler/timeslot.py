@@ -1,27 +1,33 @@
+from scheduler.registry import InternedValue
 
 
-class Timeslot():
+class Timeslot(InternedValue):
     """
     A timeslot a lecture can be held at.
     """
+    __slots__ = ('_key',)
+
     def __init__(self, day, start, end):
-        
-        self._day = day
-        self._start = start
-        self._end = end
+        """
+        Constructor
+        """
+        self._set('_key', (day, start, end))
+        super().__init__()
+
+    @property
+    def day(self):
+        return self._key[0]
+
+    @property
+    def start(self):
+        return self._key[1]
+
+    @property
+    def end(self):
+        return self._key[2]
         
     def __repr__(self):
-        return '<Timeslot {} {}-{}>'.format(
-            self._day, self._start, self._end)
+        return '<Timeslot {} {}-{}>'.format(*self._key)
     
     def __str__(self):
-        return '{} {}-{}'.format(
-            self._day, self._start, self._end)
-        
-    def __hash__(self):
-        return hash(self._day + self._start + self._end)
-    
-    def __eq__(self, other):
-        return (self._day == other._day and
-                self._start == other._start and
-                self._end == other._end)
\ No newline at end of file
+        return '{} {}-{}'.format(*self._key)
@@ -1,13 +1,37 @@
 from scheduler import Timeslot, Room, Instructor
 from scheduler.assignment import Assignment
-from scheduler.exceptions import ImpossibleAssignments
-from scheduler.helper import format_for_print, sort_dict_by_mrv
-from copy import deepcopy
+from scheduler.registry import ValueRegistry
+from scheduler.exceptions import ImpossibleAssignments, SearchLimitReached
+from scheduler.model import CompiledModel
+from scheduler.factorized import (FactorizedModel, FactorizedState, AvailabilityPropagator,
+                                  ResourceTimePropagator, FactorizedLoadPropagator,
+                                  LectureSelector, INSTRUCTOR, ROOM)
+from scheduler.state import SearchState
+from scheduler.propagation import (PropagationEngine, ConflictPropagator,
+                                   InstructorLoadPropagator)
+from scheduler.search import BacktrackingSearch
+from scheduler.heuristics import LectureQueue, WeightedDegreeSelector, restart_cutoffs
+from scheduler.matching import ResourceMatchingPropagator
+from scheduler.nogoods import NogoodPropagator
+from scheduler.portfolio import portfolio_configurations, solve_portfolio
+from scheduler.budget import SearchBudget
+from scheduler.local_search import MinConflictsSearch
+from scheduler.stats import SearchStats, PrintingObserver
+from scheduler.repair import find_neighbours
+from scheduler.transposition import TranspositionTable
+from scheduler.decomposition import find_components, solve_components
+from scheduler.symmetry import Symmetries
+from scheduler.schedule import Schedule, timeslot_order
+from scheduler.options import SearchOptions
+from scheduler.helper import count_bits, iter_bits, lowest_bit
 import warnings
-from collections import Counter
-from pandas import DataFrame
 import time
-import operator
+import random
+
+
+# The number of matrix entries the batched least-constraining-value 
+# heuristic multiplies at once, which bounds its memory.
+LCV_BLOCK_SIZE = 1 << 22
 
 
 class Timetable():
@@ -17,236 +41,887 @@ class Timetable():
     """
     def __init__(self, lecture_list, instructor_list, 
                  room_list, timeslot_list, max_lectures_per_instructor,
-                 print_intermediate_results=False):
+                 print_intermediate_results=False, global_constraints=True,
+                 model='product'):
         """
         Constructor
+
+        Args:
+            print_intermediate_results (bool): Whether to print the progress of
+                the search every ten seconds.
+            global_constraints (bool): Whether to prune with matchings over all
+                lectures rather than only from assigned lectures.
+            model (str): 'product' gives every lecture one variable over all its
+                combinations of instructor, room and timeslot. 'factorized' gives
+                it three variables, which needs far less memory but propagates
+                less and does not support the local search.
         """
+        if model not in ('product', 'factorized'):
+            raise ValueError('Unknown model %s.' % model)
+        start = time.perf_counter()
+        self._options = dict(global_constraints=global_constraints, model=model)
+        # Interns all instructors, rooms, timeslots and assignments.
+        self._registry = ValueRegistry()
+        # The lists may be iterators, e.g. of the rows of a file, which are
+        # read once while the values are constructed.
         self._lectures = self._construct_lectures(lecture_list)
         self._instructors = self._construct_instructors(instructor_list)
         self._rooms = self._construct_rooms(room_list)
         self._timeslots = self._construct_timeslots(timeslot_list)
-        self.print_intermediate_results = print_intermediate_results
         self._scheduled = False
-        self._schedule = {}
-        self._schedule_df = None
-        self._assignments = self._construct_assignments()
+        self._schedule = Schedule()
+        self._factorized = model == 'factorized'
+        if self._factorized:
+            self._assignments = None
+            self._model = FactorizedModel(self._lectures, self._instructors,
+                                          self._rooms, self._timeslots, self._registry)
+        else:
+            self._assignments = self._construct_assignments()
+            self._model = CompiledModel(self._lectures, self._assignments)
         self._max_lectures_per_instructor = max_lectures_per_instructor
+        self._global_constraints = global_constraints
+        self._lcv = 'batched'
+        self._rng = None
+        # The index of the value each variable should keep while repairing.
+        self._preferred = None
+        self._nogoods = None
+        self._table = None
+        self._symmetries = None
+        self._break_symmetries = True
+        # Called at every node, stops the search once it returns True.
+        self._should_stop = None
+        self._budget = None
+        self._best_assigned = []
+        self._best_n_assigned = 0
+        self.stop_reason = None
+        self._engine = PropagationEngine(self._construct_propagators())
+        self._observers = []
+        if print_intermediate_results:
+            self._observers.append(PrintingObserver())
+        self._profile = False
+        self._compile_time = time.perf_counter() - start
+        self.stats = SearchStats()
+        self.stats.add_time('compile', self._compile_time)
  
     
 # ----------------------- methods for scheduling -----------------------
 
-    def find_schedule(self):
-        """Schedule the timetable."""
-        # Use a dictionary to map an assignment to each lecture.
-        schedule = self._init_schedule_dict()
+    def add_propagator(self, propagator):
+        """Add a constraint that is notified about every changed lecture."""
+        self._engine.add_propagator(propagator)
+
+    def add_observer(self, observer):
+        """Add a SearchObserver that receives the progress events of the search."""
+        self._observers.append(observer)
+
+    def find_schedule(self, options=None, timeout=None, node_limit=None, memory_limit=None,
+                      profile=False):
+        """
+        Schedule the timetable.
+
+        The reason the search stopped is stored in stop_reason: 'solved',
+        'infeasible', 'timeout', 'node_limit' or 'memory_limit'. If the budget
+        ran out, the largest partial schedule is kept. Counters and timers are
+        stored in stats.
+
+        Args:
+            options (SearchOptions): How to search.
+            timeout (float): Seconds after which the search is stopped.
+            node_limit (int): The number of nodes after which it is stopped.
+            memory_limit (float): Megabytes of peak memory of the process after
+                which it is stopped.
+            profile (bool): Whether to also measure propagation and value
+                ordering, which slows the search down a little.
+
+        Raises:
+            ImpossibleAssignments: If no complete schedule exists.
+        """
+        if options is None:
+            options = SearchOptions()
+        if options.method == 'local' and self._factorized:
+            raise ValueError('The local search needs the product model.')
+        if (options.method == 'local' and timeout is None and node_limit is None and
+                memory_limit is None):
+            raise ValueError('The local search needs a timeout, node limit or memory limit.')
+
+        self._profile = profile
+        self.stats = SearchStats()
+        self.stats.add_time('compile', self._compile_time)
+        for observer in self._observers:
+            observer.on_start(self.stats)
+        budget = dict(timeout=timeout, node_limit=node_limit, memory_limit=memory_limit)
+        start = time.perf_counter()
+        components = self._find_components() if options.decompose else []
+        if len(components) > 1:
+            self.stop_reason, assigned = self._solve_components(components, options, budget)
+        elif options.workers is None:
+            self.stop_reason, assigned = self._solve(options, **budget)
+        else:
+            configurations = portfolio_configurations(options.workers, options)
+            self.stop_reason, assigned, self.stats = solve_portfolio(self, configurations,
+                                                                     budget)
+        self.stats.add_time('search', time.perf_counter() - start)
+        return self._finish_search(assigned)
+
+    def _find_components(self):
+        """Get the lectures of each independent component of the timetable."""
+        return find_components(self._model.n_lectures, self._model.resource_groups())
+
+    def _solve_components(self, components, options, budget):
+        """
+        Schedule each component with its own timetable and merge their 
+        schedules, like _solve.
+        """
+        timetables = []
+        for lectures in components:
+            timetable = self._component_timetable(
+                [self._model.lectures[lecture] for lecture in lectures])
+            timetable._profile = self._profile
+            timetables.append(timetable)
+        assigned = [None] * self._model.n_variables
+        reasons = []
+        for position, reason, component_assigned, stats in solve_components(
+                timetables, options, budget):
+            reasons.append(reason)
+            self.stats.add(stats)
+            schedule = timetables[position]._extract_schedule(component_assigned)
+            for variable, index in enumerate(self._model.encode_schedule(schedule)):
+                if index is not None:
+                    assigned[variable] = index
+        if 'infeasible' in reasons:
+            return 'infeasible', assigned
+        for reason in reasons:
+            if reason != 'solved':
+                return reason, assigned
+        return 'solved', assigned
+
+    def _component_timetable(self, lectures):
+        """
+        Construct the timetable of some of the lectures with the instructors
+        and rooms that can be used for them.
+        """
+        selected = set(lectures)
+        _, instructor_list, room_list, timeslot_list = self._spec_lists()
+        instructor_list, room_list = (
+            [[spec[0], [lecture for lecture in spec[1] if lecture in selected], spec[2], spec[3]]
+             for spec in specs if selected.intersection(spec[1])]
+            for specs in (instructor_list, room_list))
+        return Timetable(lectures, instructor_list, room_list, timeslot_list,
+                         self._max_lectures_per_instructor, **self._options)
+
+    def _spec_lists(self):
+        """
+        Get the lecture, instructor, room and timeslot lists of the timetable,
+        built from its values since it may have been constructed from iterators.
+        """
+        def resource_spec(key, resource):
+            timeslots = sorted(resource.timeslots, key=timeslot_order)
+            days = list(dict.fromkeys(timeslot.day for timeslot in timeslots))
+            times = list(dict.fromkeys('%s-%s' % (timeslot.start, timeslot.end) 
+                                       for timeslot in timeslots))
+            return [key, sorted(resource.lectures, key=repr), days, times]
+
+        return (list(self._lectures),
+                [resource_spec(instructor.name, instructor) for instructor in self._instructors],
+                [resource_spec(room.number, room) for room in self._rooms],
+                [str(timeslot) for timeslot in self._timeslots])
+
+    def check_schedule(self, schedule):
+        """
+        Check in linear time whether a schedule, e.g. from a cache, is a complete
+        schedule of this timetable that satisfies all constraints.
+        """
+        if len(schedule) != len(self._lectures) or not all(
+                lecture in schedule for lecture in self._lectures):
+            return False
+        instructors = {instructor: instructor for instructor in self._instructors}
+        rooms = {room: room for room in self._rooms}
+        timeslots = set(self._timeslots)
+        used = set()
+        loads = {}
+        for lecture, assignment in schedule.items():
+            instructor = instructors.get(assignment.instructor)
+            room = rooms.get(assignment.room)
+            timeslot = assignment.timeslot
+            if (instructor is None or room is None or timeslot not in timeslots or
+                    not instructor.can_teach(lecture) or not room.can_be_used_for(lecture) or
+                    not instructor.can_teach_at(timeslot) or not room.can_be_used_at(timeslot)):
+                return False
+            if (instructor, timeslot) in used or (room, timeslot) in used:
+                return False
+            used.add((instructor, timeslot))
+            used.add((room, timeslot))
+            loads[instructor] = loads.get(instructor, 0) + 1
+            if loads[instructor] > self._max_lectures_per_instructor:
+                return False
+        return True
+
+    def canonical_spec(self):
+        """
+        Get the problem as a dictionary that is equal for all specifications of
+        the same timetable, with sorted lists and resources by their timeslots.
+        """
+        def resource_spec(resource):
+            return [resource.name if isinstance(resource, Instructor) else resource.number,
+                    sorted(resource.lectures, key=repr),
+                    sorted(str(timeslot) for timeslot in resource.timeslots)]
+
+        # Lectures can be any hashable values, which are not always comparable.
+        return {'lectures': sorted(self._lectures, key=repr),
+                'instructors': sorted((resource_spec(instructor) for instructor in self._instructors),
+                                      key=repr),
+                'rooms': sorted((resource_spec(room) for room in self._rooms), key=repr),
+                'timeslots': sorted(str(timeslot) for timeslot in self._timeslots),
+                'max_lectures_per_instructor': self._max_lectures_per_instructor}
+
+    def _encode_rows(self):
+        """Get the schedule as JSON rows of lecture, instructor, room and timeslot."""
+        return [[lecture, assignment.instructor.name, assignment.room.number, 
+                 str(assignment.timeslot)]
+                for lecture, assignment in self._schedule.items()]
+
+    def _decode_rows(self, rows):
+        """Get the schedule of rows of _encode_rows, or None if they use unknown values."""
+        instructors = {instructor.name: instructor for instructor in self._instructors}
+        rooms = {room.number: room for room in self._rooms}
+        timeslots = {str(timeslot): timeslot for timeslot in self._timeslots}
+        schedule = {}
+        for lecture, instructor, room, timeslot in rows:
+            instructor = instructors.get(instructor)
+            room = rooms.get(room)
+            timeslot = timeslots.get(timeslot)
+            if instructor is None or room is None or timeslot is None:
+                return None
+            schedule[lecture] = self._registry.intern(Assignment(instructor, room, timeslot))
+        return schedule
 
+    def _use_schedule(self, schedule):
+        """Store a complete schedule that has been checked as if it had been found."""
+        self.stats = SearchStats()
+        self.stats.add_time('compile', self._compile_time)
+        self.stop_reason = 'solved'
+        self._scheduled = True
+        self._schedule = Schedule(schedule)
+        return self._schedule
+
+    def iter_schedules(self, lcv='batched', timeout=None, node_limit=None, memory_limit=None):
+        """
+        Enumerate all schedules of the timetable, one at a time, with a resumed
+        chronological search that does not hold them in memory. The schedule of
+        the timetable is kept. Once the enumeration has finished, stop_reason is
+        set like by find_schedule. No other search may run before that.
+
+        Args:
+            lcv: As for SearchOptions.
+            timeout, node_limit, memory_limit: As for find_schedule, for the
+                whole enumeration.
+        """
+        for assigned in self._enumerate(lcv, timeout, node_limit, memory_limit):
+            yield self._extract_schedule(assigned)
+
+    def count_schedules(self, lcv=None, timeout=None, node_limit=None, memory_limit=None):
+        """
+        Count the schedules like iter_schedules without constructing them, or
+        those found until the budget ran out. Values are not ordered by default.
+        """
+        n_schedules = 0
+        for _ in self._enumerate(lcv, timeout, node_limit, memory_limit):
+            n_schedules += 1
+        return n_schedules
+
+    def _enumerate(self, lcv, timeout, node_limit, memory_limit):
+        """
+        Enumerate all complete search states.
+
+        Yields:
+            The index of the assigned value of each variable, which is only
+            valid until the next one is requested.
+        """
+        if lcv not in ('batched', 'trial', None):
+            raise ValueError('Unknown least-constraining-value mode %s.' % lcv)
+        self.stop_reason = None
+        self.stats = SearchStats()
+        self.stats.add_time('compile', self._compile_time)
+        for observer in self._observers:
+            observer.on_start(self.stats)
+        self._lcv = lcv
+        self._rng = None
+        self._budget = SearchBudget(timeout, node_limit, memory_limit, self._should_stop)
+        start = time.perf_counter()
+        state = self._init_search_state()
+        self._best_assigned = list(state.assigned)
+        self._best_n_assigned = 0
+        found = False
         try:
-            final_schedule = self._assign_values(schedule)
-            self._scheduled = True
-            self._schedule = final_schedule
-            self._schedule_df = self._save_schedule_in_dataframe()
+            self._engine.propagate(state, range(self._model.n_variables))
+            selector = LectureSelector(state) if self._factorized else LectureQueue(state)
+            search = BacktrackingSearch(self._engine, selector.select, self._sort_by_lcv,
+                                        on_node=self._visit_node,
+                                        on_failure=self._record_failure,
+                                        should_stop=self._budget.exhausted)
+            for state in search.iter_solutions(state):
+                found = True
+                yield state.assigned
+            self.stop_reason = 'solved' if found else 'infeasible'
         except ImpossibleAssignments:
-            raise ImpossibleAssignments( 'Unable to find schedule without violating constraints.' )
-             
-        
-    def _assign_values(self, schedule):
+            self.stop_reason = 'infeasible'
+        except SearchLimitReached as error:
+            self.stop_reason = error.reason
+        self.stats.add_time('search', time.perf_counter() - start)
+        for observer in self._observers:
+            observer.on_finish(self.stop_reason, self.stats)
+
+    def repair(self, change, radius=1, lcv='batched', timeout=None, node_limit=None,
+               memory_limit=None, profile=False):
         """
-        Assign an unassigned variable and traverse the search tree further.
-        
+        Adapt the schedule of this timetable to a change of the problem.
+
+        At first only new lectures, the ones whose assignment is no longer
+        possible and their neighbours up to the radius are scheduled anew. When
+        that fails, the next ring of neighbours is freed. Previous assignments
+        are tried first, so the schedule stays close to the current one.
+
         Args:
-            schedule (dict): The partially constructed schedule.
-            assignable (set): The values that have not yet been assigned.
+            change (ScheduleChange): The change of the problem.
+            lcv: As for SearchOptions.
+            timeout, node_limit, memory_limit, profile: As for find_schedule,
+                for the whole repair.
+
+        Returns:
+            Timetable: A new timetable for the changed problem.
+
+        Raises:
+            ImpossibleAssignments: If the changed problem has no schedule.
         """
-        # base case 
-        if self._schedule_complete(schedule):
-            return schedule
-        
-        if self.print_intermediate_results:
-            # Print the current state of the scheduler every ten seconds.
-            if int(time.time()) % 10 == 0:
-                print('\n')
-                print(schedule)
-                n_assigned = 0
-                for a in schedule.values():
-                    if not isinstance(a, set): n_assigned += 1
-                print('assigned: ', n_assigned)
-                print(list(self._get_unassigned_vars(schedule)))
-
-        schedule = deepcopy(schedule)
-        
-        # Iterate over unassigned variables.
-        for lecture in self._get_unassigned_vars(schedule, sort=True):
-            # Iterate over domain.
-            domain = deepcopy(schedule[lecture])
-            for assignment in self._sort_by_lcv(domain, lecture, schedule):
-                schedule[lecture] = assignment
-                # Propagate constraints.
-                try:
-                    reduced_domains_schedule = self._reduce_domains(deepcopy(schedule), assignment)
-                    reduced_domains_schedule = self._resolve_small_domains(reduced_domains_schedule)
-                    # Recursively call the function to traverse the search tree.
-                    return self._assign_values(reduced_domains_schedule)
-                except ImpossibleAssignments:
-                    # Remove invalid assignment and restore domain if higher order constraints cause 
-                    # domain to become empty.
-                    schedule[lecture] = domain
-                    continue
-                
+        if lcv not in ('batched', 'trial', None):
+            raise ValueError('Unknown least-constraining-value mode %s.' % lcv)
+        timetable = Timetable(*change.apply(*self._spec_lists()), 
+                              self._max_lectures_per_instructor, **self._options)
+        timetable._observers = list(self._observers)
+        timetable._repair_schedule(self._schedule, radius, lcv, timeout, node_limit,
+                                   memory_limit, profile)
+        return timetable
 
-                        
-        # No assignment could be found for any lecture at this point.
-        raise ImpossibleAssignments('No assignment could be found for any lecture at this point.')
-    
-    def _reduce_domains(self, schedule, new_assignment):
-        """Reduce domains by propagating constraints.""" 
-        busy_instructors = self._get_busy_instructors(schedule)
-        
-        for lecture in self._get_unassigned_vars(schedule):
-            # Remove the newly assigned value from any other domain.
-            schedule[lecture].discard(new_assignment)
-            # Check whether the removal makes the domain empty.
-            if not schedule[lecture]:
-                raise ImpossibleAssignments('Assignment leads to inconsistencies.')
-            domain = deepcopy(schedule[lecture])
-            
-            for assignment in domain:
-                # Remove values from other domains if they cointain the same instructor at the same time.
-                # Remove values from other domains if they cointain the same room at the same time.
-                # Remove values from other domains if they cointain an instructor that 
-                # already gives the maximun number of lectures.
-                if (new_assignment.overlaps_instructor_at_time(assignment) or
-                    new_assignment.overlaps_room_at_time(assignment) or
-                    assignment.instructor in busy_instructors):
-                    schedule[lecture].discard(assignment)
-                    # Check whether the removal makes the domain empty.
-                    if not schedule[lecture]:
-                        raise ImpossibleAssignments('Assignment leads to inconsistencies.')
-        
-        return schedule
+    def _repair_schedule(self, schedule, radius, lcv, timeout, node_limit, memory_limit,
+                         profile):
+        """Repair the schedule of another timetable for this one, see repair."""
+        self._profile = profile
+        self.stats = SearchStats()
+        self.stats.add_time('compile', self._compile_time)
+        for observer in self._observers:
+            observer.on_start(self.stats)
+        start = time.perf_counter()
+        self._lcv = lcv
+        self._rng = None
+        self._budget = SearchBudget(timeout, node_limit, memory_limit, self._should_stop)
+        self._engine.stats = self.stats if self._profile else None
+        self._preferred = self._model.encode_schedule(schedule)
+        try:
+            self.stop_reason, assigned = self._solve_neighbourhoods(radius)
+        finally:
+            self._engine.stats = None
+            self._preferred = None
+        self.stats.add_time('search', time.perf_counter() - start)
+        return self._finish_search(assigned)
 
-    def _resolve_small_domains(self, schedule):
+    def _solve_neighbourhoods(self, radius):
         """
-        Assign domains with a cardinality of one and reduce domains further.
+        Search the preferred values with growing sets of free lectures, like
+        _solve.
         """
-        while(self._contains_small_domains(schedule)):
-            for lecture in self._get_unassigned_vars(schedule):
-                if len(schedule[lecture]) == 1:
-                    assignment = schedule[lecture].pop()
-                    schedule[lecture] = assignment
-                    schedule = self._reduce_domains(schedule, assignment)
+        model = self._model
+        preferred = self._preferred
+        # The lectures that keep a previous assignment. The others are free.
+        kept = {}
+        for lecture, name in enumerate(model.lectures):
+            variables = model.variables(lecture)
+            if model.is_possible(lecture, preferred[variables.start:variables.stop]):
+                kept[name] = lecture
+        free = set(model.lectures) - set(kept)
+        schedule = self._extract_schedule(preferred)
+        schedule = {name: schedule[name] for name in kept}
+        for _ in range(radius):
+            free |= find_neighbours(free, schedule, self._instructors, self._rooms,
+                                    self._max_lectures_per_instructor)
 
-        return schedule
-        
-    def _get_busy_instructors(self, schedule):
-        """Check whether an instructor gives too many lectures."""
-        instructor_counts = Counter([assignment.instructor 
-                                      for assignment in schedule.values()
-                                      if not isinstance(assignment, set)])
-        busy_instructors = set()
-        
-        for instructor, count in instructor_counts.items():
-            if count > self._max_lectures_per_instructor:
-                busy_instructors.add(instructor)
-        return busy_instructors    
-        
-    def _init_schedule_dict(self):
+        state = self._init_search_state()
+        self._best_assigned = list(state.assigned)
+        self._best_n_assigned = 0
+        try:
+            self._engine.propagate(state, range(model.n_variables))
+        except ImpossibleAssignments:
+            return 'infeasible', self._extend_partial(self._best_assigned)
+        selector = LectureSelector(state) if self._factorized else LectureQueue(state)
+        while True:
+            state.mark()
+            # The kept lecture whose previous assignment failed, if any.
+            failed = None
+            try:
+                for name, lecture in kept.items():
+                    if name not in free:
+                        failed = name
+                        self._keep_previous(state, lecture)
+                failed = None
+                self._solve_free_lectures(state, selector)
+                return 'solved', list(state.assigned)
+            except ImpossibleAssignments:
+                state.undo()
+            except SearchLimitReached as error:
+                state.undo()
+                return error.reason, self._extend_partial(self._best_assigned)
+            if len(free) == model.n_lectures:
+                return 'infeasible', self._extend_partial(self._best_assigned)
+            if failed is not None:
+                free.add(failed)
+                continue
+            neighbours = find_neighbours(free, {name: assignment for name, assignment 
+                                                in schedule.items() if name not in free},
+                                         self._instructors, self._rooms, 
+                                         self._max_lectures_per_instructor)
+            # Free all lectures if the free ones are not blocked by others.
+            free |= neighbours or set(model.lectures)
+
+    def _keep_previous(self, state, lecture):
         """
-        Initialize schedule where each lecture is mapped to all possible assignments.
+        Assign the preferred values to the variables of a lecture.
+
+        Raises:
+            ImpossibleAssignments: If the values have been removed by the
+                lectures kept so far or lead to inconsistencies.
         """
-        schedule = {}
+        for variable in self._model.variables(lecture):
+            if state.is_assigned(variable):
+                continue
+            index = self._preferred[variable]
+            if not state.domains[variable] >> index & 1:
+                raise ImpossibleAssignments('The previous value is no longer possible.',
+                                            (variable,))
+            self._engine.assign(state, variable, index)
+            self._engine.propagate(state)
+
+    def _solve_free_lectures(self, state, selector):
+        """Run a backtracking search over the lectures that are not kept."""
+        self._nogoods = NogoodPropagator()
+        self._engine.add_propagator(self._nogoods)
+        try:
+            self._search(state, selector)
+        finally:
+            self._engine.remove_propagator(self._nogoods)
+            self._nogoods = None
+
+    def _finish_search(self, assigned):
+        """
+        Notify the observers that the search stopped and store its schedule.
+
+        Raises:
+            ImpossibleAssignments: If the search proved that no schedule 
+                exists.
+        """
+        schedule = self._extract_schedule(assigned)
+        # The greedy extension of a partial schedule may have completed it.
+        if self.stop_reason not in ('solved', 'infeasible') and self.check_schedule(schedule):
+            self.stop_reason = 'solved'
+        for observer in self._observers:
+            observer.on_finish(self.stop_reason, self.stats)
+
+        self._scheduled = self.stop_reason == 'solved'
+        self._schedule = schedule
+        if self.stop_reason == 'infeasible':
+            raise ImpossibleAssignments( 'Unable to find schedule without violating constraints.' )
+        return self._schedule
+
+    def _solve(self, options, timeout=None, node_limit=None, memory_limit=None):
+        """
+        Run a single search with the arguments of find_schedule.
+
+        Returns:
+            The reason the search stopped and the index of the assigned value of
+            each variable, of the largest partial schedule if not solved.
+        """
+        self._lcv = options.lcv
+        self._break_symmetries = options.break_symmetries
+        self._budget = SearchBudget(timeout, node_limit, memory_limit, self._should_stop)
+        if options.method == 'local':
+            return self._solve_locally(options.seed)
+        self._engine.stats = self.stats if self._profile else None
+        start = time.perf_counter()
+        # The state maps each lecture to its remaining values and records
+        # every change so that it can be undone when backtracking.
+        state = self._init_search_state()
+        self._best_assigned = list(state.assigned)
+        self._best_n_assigned = 0
+        self._nogoods = NogoodPropagator() if options.backjumping else None
+        if self._nogoods is not None:
+            self._engine.add_propagator(self._nogoods)
+
+        try:
+            try:
+                self._engine.propagate(state, range(self._model.n_variables))
+            finally:
+                self.stats.add_time('initialization', time.perf_counter() - start)
+            if options.table_size is not None:
+                self._table = TranspositionTable(state, options.table_size)
+            if options.restarts is None:
+                self._rng = None
+                selector = LectureSelector(state) if self._factorized else LectureQueue(state)
+                self._search(state, selector)
+            else:
+                self._rng = random.Random(options.seed)
+                self._search_with_restarts(state, options.restarts, options.restart_scale)
+            return 'solved', list(state.assigned)
+        except ImpossibleAssignments:
+            return 'infeasible', self._extend_partial(self._best_assigned)
+        except SearchLimitReached as error:
+            return error.reason, self._extend_partial(self._best_assigned)
+        finally:
+            self._engine.stats = None
+            if self._nogoods is not None:
+                self._engine.remove_propagator(self._nogoods)
+                self._nogoods = None
+            if self._table is not None:
+                self.stats.n_table_hits = self._table.n_hits
+                self.stats.n_table_misses = self._table.n_misses
+                self._table = None
+
+    def _solve_locally(self, seed):
+        """Run a min-conflicts search, like _solve."""
+        model = self._model
+        if not all(model.domains):
+            # Lectures without any value can never be scheduled.
+            return 'infeasible', self._extend_partial([None] * model.n_lectures)
+        search = MinConflictsSearch(model, self._max_lectures_per_instructor, 
+                                    random.Random(seed))
+        try:
+            return 'solved', search.solve(should_stop=self._budget.exhausted)
+        except SearchLimitReached as error:
+            partial = search.consistent_part(search.best_assigned)
+            return error.reason, self._extend_partial(partial)
+        finally:
+            self.stats.n_nodes = search.n_steps
+
+    def _search(self, state, selector, on_failure=None, fail_limit=None):
+        """Run a backtracking search from the given state."""
+        order_values = self._sort_by_lcv
+        if self._profile:
+            order_values = self._timed_sort_by_lcv
+        search = BacktrackingSearch(self._engine, selector.select, order_values,
+                                    on_node=self._visit_node, 
+                                    on_failure=lambda error: self._record_failure(error, on_failure),
+                                    nogoods=self._nogoods, 
+                                    should_stop=self._budget.exhausted,
+                                    table=self._table,
+                                    symmetries=self._get_symmetries())
+        try:
+            return search.solve(state, fail_limit=fail_limit)
+        finally:
+            self.stats.n_backjumps += search.n_backjumps
+
+    def _get_symmetries(self):
+        """
+        Get the symmetries of the timetable if they are to be broken and 
+        there are any. They are detected on first use.
+        """
+        if not self._break_symmetries:
+            return None
+        if self._symmetries is None:
+            self._symmetries = Symmetries(self._model, self._lectures, self._instructors,
+                                          self._rooms, self._timeslots)
+        return self._symmetries or None
+
+    def _search_with_restarts(self, state, schedule, scale):
+        """
+        Run randomized searches with dom/wdeg until one of them finishes 
+        within its cutoff.
+        """
+        selector = WeightedDegreeSelector(state, self._rng)
+        for cutoff in restart_cutoffs(schedule, scale):
+            try:
+                return self._search(state, selector, on_failure=selector.bump, 
+                                    fail_limit=cutoff)
+            except SearchLimitReached as error:
+                if error.reason != 'fail_limit':
+                    raise
+            self.stats.n_restarts += 1
+            for observer in self._observers:
+                observer.on_restart(self.stats)
+
+    def _visit_node(self, state):
+        """
+        Count a node of the search, keep the largest partial schedule and 
+        notify the observers.
+        """
+        self.stats.n_nodes += 1
+        if state.n_assigned > self._best_n_assigned:
+            self._best_assigned = list(state.assigned)
+            self._best_n_assigned = state.n_assigned
+        for observer in self._observers:
+            observer.on_node(state, self.stats)
+
+    def _record_failure(self, error, on_failure=None):
+        """Count a failed value and notify the observers."""
+        self.stats.n_backtracks += 1
+        if error.lectures:
+            self.stats.n_wipeouts += 1
+        if on_failure is not None:
+            on_failure(error)
+        for observer in self._observers:
+            observer.on_failure(error, self.stats)
         
-        for lecture in self._lectures:
-            domain = set()
-            for assignment in self._assignments:
-                if assignment.satisfies_constraints(lecture):
-                    domain.add(assignment)
-            schedule[lecture] = domain
-        return schedule
-    
-    def _schedule_complete(self, schedule):
-        """Check whether there are still unassigned variables in the schedule."""
-        for assignment in schedule.values():
-            if isinstance(assignment, set):
-                return False
-        return True
+    def _extend_partial(self, assigned):
+        """
+        Greedily assign further lectures of a partial schedule to their first
+        value without conflicts. The factorized model keeps it as it is.
+        """
+        if self._factorized:
+            return list(assigned)
+        model = self._model
+        assigned = list(assigned)
+        loads = [0] * len(model.instructors)
+        excluded = 0
+        for index in assigned:
+            if index is not None:
+                loads[model.assignment_instructors[index]] += 1
+                excluded |= model.conflict_mask(index)
+        for instructor_id, instructor in enumerate(model.instructors):
+            if loads[instructor_id] >= self._max_lectures_per_instructor:
+                excluded |= model.instructor_masks[instructor]
+
+        for lecture in sorted(range(model.n_lectures), 
+                              key=lambda lecture: count_bits(model.domains[lecture])):
+            if assigned[lecture] is not None:
+                continue
+            available = model.domains[lecture] & ~excluded
+            if not available:
+                continue
+            index = lowest_bit(available)
+            assigned[lecture] = index
+            excluded |= model.conflict_mask(index)
+            instructor_id = model.assignment_instructors[index]
+            loads[instructor_id] += 1
+            if loads[instructor_id] >= self._max_lectures_per_instructor:
+                excluded |= model.instructor_masks[model.assignments[index].instructor]
+        return assigned
+
+    def _init_search_state(self):
+        """
+        Initialize search state where each lecture is mapped to the bitset of 
+        all possible assignments.
+        """
+        if self._factorized:
+            return FactorizedState(self._model)
+        return SearchState(self._model)
+
+    def _extract_schedule(self, assigned):
+        """
+        Get the dictionary mapping each assigned lecture to its assignment,
+        given the index of the assigned value of each lecture.
+        """
+        return Schedule(self._model.extract_schedule(assigned))
     
-    def _get_unassigned_vars(self, schedule, sort=False):
+    def _get_unassigned_vars(self, state):
         """Get all variables that have not yet been assigned a value."""
-        if sorted:
-            schedule = sort_dict_by_mrv(schedule)
-        
-        unassigned_lectures = []
-        
-        for lecture, assignment in schedule.items():
-            if isinstance(assignment, set):
-                unassigned_lectures.append(lecture)
-        return unassigned_lectures
+        return state.unassigned()
     
-    def _sort_by_lcv(self, domain, lecture, schedule):
-        """Sort the values in a domain according to least-constraining-value heuristic."""
-        schedule = deepcopy(schedule)
-        value_cardinality = {value: 0 for value in domain}
-        for value in domain:
+    def _sort_by_lcv(self, lecture, state):
+        """
+        Sort the values in a domain according to least-constraining-value heuristic.
+
+        Returns:
+            The indices of the values, the least constraining value first.
+            Ties keep the order of the indices unless the search is randomized.
+        """
+        if self._lcv is None:
+            values = list(iter_bits(state.domains[lecture]))
+            if self._rng is not None:
+                self._rng.shuffle(values)
+            return self._prefer_previous(lecture, values)
+        if self._lcv == 'batched' and not self._factorized:
+            values, scores = self._score_values_batched(lecture, state)
+        else:
+            values, scores = self._score_values_by_trial(lecture, state)
+
+        if self._rng is None:
+            order = sorted(range(len(values)), key=lambda i: -scores[i])
+        else:
+            ties = [self._rng.random() for _ in values]
+            order = sorted(range(len(values)), key=lambda i: (-scores[i], ties[i]))
+        return self._prefer_previous(lecture, [values[i] for i in order])
+
+    def _prefer_previous(self, lecture, values):
+        """Move the value a lecture should keep while repairing to the front."""
+        if self._preferred is not None:
+            index = self._preferred[lecture]
+            if index is not None and index in values:
+                values.remove(index)
+                values.insert(0, index)
+        return values
+
+    def _timed_sort_by_lcv(self, lecture, state):
+        """Sort the values like _sort_by_lcv and add the time to the stats."""
+        with self.stats.timer('lcv'):
+            return self._sort_by_lcv(lecture, state)
+
+    def _score_values_by_trial(self, lecture, state):
+        """
+        Score each value by the number of values that remain in the other 
+        domains after assigning it. Values that empty a domain score zero.
+        """
+        values = list(iter_bits(state.domains[lecture]))
+        scores = []
+        for index in values:
             # Assign value to lecture and reduce the other domains.
+            state.mark()
             try:
-                assigned_schedule = deepcopy(schedule)
-                assigned_schedule[lecture] = value
-                value_cardinality[value] = self._get_number_of_remaining_values(
-                    self._reduce_domains(assigned_schedule, value)
-                )
+                self._engine.reduce(state, lecture, index)
+                scores.append(self._get_number_of_remaining_values(state))
             except ImpossibleAssignments:
-                continue
+                scores.append(0)
+            finally:
+                state.undo()
+        return values, scores
             
-        sorted_tuples = sorted(value_cardinality.items(), key=operator.itemgetter(1), reverse=True)
-        sorted_values = (tup[0] for tup in sorted_tuples)
-        return sorted_values
+    def _score_values_batched(self, lecture, state):
+        """
+        Score the values of a domain like _score_values_by_trial, but all at
+        once by multiplying their conflict masks with the other domains. Unlike
+        the trial, this ignores the values removed by learned nogoods. The
+        matrices only have the columns that a value can remove and are
+        multiplied in blocks.
+        """
+        import numpy as np
+        model = self._model
+        values = list(iter_bits(state.domains[lecture]))
+        others = [other for other in state.unassigned() if other != lecture]
+        if not others:
+            return values, [0] * len(values)
+
+        loads = state.instructor_loads
+        removable = 0
+        for index in values:
+            removable |= self._removed_mask(index, loads)
+        remaining_domains = [state.domains[other] for other in others]
+        union = 0
+        for domain in remaining_domains:
+            union |= domain
+        columns = np.fromiter(iter_bits(union & removable), dtype=np.intp)
+        domains = model.mask_matrix(remaining_domains, columns)
+        sizes = np.array([count_bits(domain) for domain in remaining_domains], 
+                         dtype=np.float32)[:, np.newaxis]
+
+        scores = []
+        block = max(1, LCV_BLOCK_SIZE // max(len(columns), 1))
+        for start in range(0, len(values), block):
+            removed = model.mask_matrix([self._removed_mask(index, loads) 
+                                         for index in values[start:start + block]], 
+                                        columns).T.astype(np.float32)
+            remaining = np.empty((len(others), removed.shape[1]), dtype=np.float32)
+            for other_start in range(0, len(others), block):
+                rows = slice(other_start, other_start + block)
+                remaining[rows] = sizes[rows] - domains[rows].astype(np.float32) @ removed
+            # Values that empty any domain are tried last as in the trial mode.
+            scores += np.where((remaining == 0).any(axis=0), 0, 
+                               remaining.sum(axis=0, dtype=np.float64)).astype(int).tolist()
+        return values, scores
+
+    def _removed_mask(self, index, loads):
+        """
+        Get the values that assigning the value with the given index removes
+        from the other domains, given the loads of the instructors.
+        """
+        model = self._model
+        mask = model.conflict_mask(index)
+        instructor_id = model.assignment_instructors[index]
+        if loads[instructor_id] + 1 >= self._max_lectures_per_instructor:
+            mask |= model.instructor_masks[model.instructors[instructor_id]]
+        return mask
             
-    def _get_number_of_remaining_values(self, schedule):
+    def _get_number_of_remaining_values(self, state):
         """Get the number of remaining values in all domains."""
         n_total = 0
-        for lecture in self._get_unassigned_vars(schedule):
-            n_total += len(schedule[lecture])
+        for lecture in self._get_unassigned_vars(state):
+            n_total += count_bits(state.domains[lecture])
         
         return n_total
     
-    def _contains_small_domains(self, schedule):
-        """Check whether the CSP contains a domain of cardinality one."""
-        for assignment in schedule.values():
-            if isinstance(assignment, set) and len(assignment) == 1:
-                return True
-        return False
-        
-    def _save_schedule_in_dataframe(self):
-        """Save the schedule dictionary to a pandas dataframe."""
-        schedule_ll = []
-        
-        for lecture, assignment in self._schedule.items():
-            schedule_ll.append([str(lecture), str(assignment.timeslot), str(assignment.instructor), str(assignment.room)])
-        df = DataFrame(schedule_ll, columns=['Lecture', 'Time', 'Instructor', 'Room'])
-        df.sort_values('Time', inplace=True)
-        return df
+    @property
+    def schedule(self):
+        """
+        The schedule of the last search, which is partial if it has been 
+        stopped. Its to_dataframe and to_table methods export it.
+        """
+        return self._schedule
 
 
 # ----------------- helper methods for initialization ------------------
+
+    def _construct_propagators(self):
+        """Construct the constraints that are propagated during the search."""
+        model = self._model
+        if self._factorized:
+            return self._construct_factorized_propagators()
+        propagators = [ConflictPropagator(model),
+                       InstructorLoadPropagator(model, self._max_lectures_per_instructor)]
+        if self._global_constraints:
+            propagators += [
+                ResourceMatchingPropagator(
+                    model, model.room_time_masks,
+                    resource_lectures=model.lecture_index(model.room_time_masks)),
+                ResourceMatchingPropagator(
+                    model, model.instructor_time_masks,
+                    resource_lectures=model.lecture_index(model.instructor_time_masks)),
+                ResourceMatchingPropagator(
+                    model, model.instructor_masks, capacity=self._max_lectures_per_instructor,
+                    resource_lectures=model.lecture_index(model.instructor_masks))]
+        return propagators
+
+    def _construct_factorized_propagators(self):
+        """Construct the constraints of the factorized model."""
+        model = self._model
+        propagators = [AvailabilityPropagator(model),
+                       ResourceTimePropagator(model, INSTRUCTOR),
+                       ResourceTimePropagator(model, ROOM),
+                       FactorizedLoadPropagator(model, self._max_lectures_per_instructor)]
+        if self._global_constraints:
+            propagators.append(ResourceMatchingPropagator(
+                model, model.instructor_masks, capacity=self._max_lectures_per_instructor,
+                lectures=[model.variable(lecture, INSTRUCTOR)
+                          for lecture in range(model.n_lectures)]))
+        return propagators
      
     def _construct_assignments(self):
         """
         Construct possible combinations of instructor, room and timeslot.
+        Combinations of an instructor and a room that have no lecture in 
+        common could never be used and are left out.
         """
+        lecture_rooms = {lecture: [] for lecture in self._lectures}
+        for room in self._rooms:
+            for lecture in room.lectures:
+                if lecture in lecture_rooms:
+                    lecture_rooms[lecture].append(room)
+
         assignments = []
         for instructor in self._instructors:
+            rooms = {room for lecture in instructor.lectures 
+                     for room in lecture_rooms.get(lecture, ())}
+            timeslots = [timeslot for timeslot in self._timeslots 
+                         if instructor.can_teach_at(timeslot)]
             for room in self._rooms:
-                for timeslot in self._timeslots:
-                    if (instructor.can_teach_at(timeslot) and 
-                        room.can_be_used_at(timeslot)):
-                        assignments.append(Assignment(instructor, room, timeslot))
+                if room not in rooms:
+                    continue
+                for timeslot in timeslots:
+                    if room.can_be_used_at(timeslot):
+                        assignments.append(
+                            self._registry.intern(Assignment(instructor, room, timeslot)))
         return assignments
         
     def _construct_lectures(self, lecture_list):
         """Construct lectures from list specification."""
         lectures = []
+        seen = set()
         for name in lecture_list:
-            if name not in lectures:
+            if name not in seen:
+                seen.add(name)
                 lectures.append(name)
             else:
                 warnings.warn('Lecture %s specified more than once.' % name)
@@ -261,7 +936,7 @@ class Timetable():
             lectures = self._construct_lectures(instructor_spec[1])
             timeslots = self._construct_constraint_timeslots(
                 instructor_spec[2], instructor_spec[3])
-            instructors.append(Instructor(name, lectures, timeslots))
+            self._add_value(instructors, Instructor(name, lectures, timeslots))
         return instructors
             
     def _construct_rooms(self, room_list):
@@ -271,17 +946,30 @@ class Timetable():
             lectures = self._construct_lectures(room_spec[1])
             timeslots = self._construct_constraint_timeslots(
                 room_spec[2], room_spec[3])
-            rooms.append(Room(room_spec[0], lectures, timeslots))
+            self._add_value(rooms, Room(room_spec[0], lectures, timeslots))
         return rooms
     
     def _construct_timeslots(self, timeslot_list):
         """Construct timeslots from list specification."""
         timeslots = []
+        seen = set()
         for timeslot_spec in timeslot_list:
             day, start_end = timeslot_spec.split()
             start, end = start_end.split('-')
-            timeslots.append(Timeslot(day, start, end))
+            timeslot = self._registry.intern(Timeslot(day, start, end))
+            if timeslot in seen:
+                warnings.warn('Timeslot %s specified more than once.' % timeslot)
+            else:
+                seen.add(timeslot)
+                timeslots.append(timeslot)
         return timeslots
+
+    def _add_value(self, values, value):
+        """Intern an instructor or room and add it unless it is already known."""
+        if value in self._registry:
+            warnings.warn('%s specified more than once.' % repr(value).strip('<>'))
+        else:
+            values.append(self._registry.intern(value))
             
             
     def _construct_constraint_timeslots(self, days, times):
@@ -295,7 +983,7 @@ class Timetable():
         for day in days:
             for start_end in times:
                 start, end = start_end.split('-')
-                timeslots.append(Timeslot(day, start, end))
+                timeslots.append(self._registry.intern(Timeslot(day, start, end)))
                 
         return timeslots
         
@@ -307,7 +995,10 @@ class Timetable():
         
     def __str__(self):
         if self._scheduled:
-            return format_for_print(self._schedule_df)
+            return self._schedule.to_table()
+        elif self._schedule:
+            return 'Partial schedule ({})\n{}'.format(
+                self.stop_reason, self._schedule.to_table())
         else:
             return "Unscheduled timetable"
             
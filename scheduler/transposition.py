@@ -0,0 +1,66 @@
+"""
+Transposition table of search states that have been proven infeasible.
+"""
+from collections import OrderedDict
+import random
+
+
+class TranspositionTable():
+    """
+    Search states whose subtree has been searched without a solution, by the
+    domains of all variables. Like a Zobrist hash, the key is the XOR of the
+    salted hashes of the domains, so it is updated in constant time when a
+    domain changes. Only the max_size most recently used states are kept.
+    """
+    def __init__(self, state, max_size=10000, seed=0):
+        """
+        Constructor
+
+        Args:
+            state (SearchState): The state to follow, also across restarts.
+            max_size (int): The number of states that are kept.
+            seed (int): The seed of the salts of the variables.
+        """
+        rng = random.Random(seed)
+        self._salts = [rng.getrandbits(64) for _ in state.domains]
+        self._domains = state.domains
+        self._hashes = [hash((salt, domain)) for salt, domain in zip(self._salts, state.domains)]
+        self._key = 0
+        for domain_hash in self._hashes:
+            self._key ^= domain_hash
+        self._max_size = max_size
+        self._states = OrderedDict()
+        self.n_hits = 0
+        self.n_misses = 0
+        state.add_listener(self)
+
+    def __len__(self):
+        return len(self._states)
+
+    def domain_changed(self, variable, domain):
+        domain_hash = hash((self._salts[variable], domain))
+        self._key ^= self._hashes[variable] ^ domain_hash
+        self._hashes[variable] = domain_hash
+
+    def assigned(self, variable):
+        pass
+
+    def unassigned(self, variable):
+        pass
+
+    def add(self):
+        """Store the current state as infeasible."""
+        self._states[self._key] = tuple(self._domains)
+        self._states.move_to_end(self._key)
+        if len(self._states) > self._max_size:
+            self._states.popitem(last=False)
+
+    def is_refuted(self):
+        """Check whether the current state has been stored as infeasible."""
+        domains = self._states.get(self._key)
+        if domains is None or domains != tuple(self._domains):
+            self.n_misses += 1
+            return False
+        self.n_hits += 1
+        self._states.move_to_end(self._key)
+        return True
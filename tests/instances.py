@@ -0,0 +1,118 @@
+"""
+Small random timetables and an independent brute-force solver, against
+which the searches are checked.
+"""
+import random
+
+
+# Sizes whose schedules can still be enumerated one by one: lectures,
+# instructors, rooms and timeslots.
+SMALL_SIZES = [(3, 2, 2, 4), (4, 2, 2, 6), (4, 3, 2, 6), (5, 3, 3, 6), (5, 3, 2, 8), (6, 3, 3, 8)]
+
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']
+TIMES = ['8-10', '10-12']
+# The times of an instructor or a room that is not restricted to any.
+DEFAULT_TIMES = ['10-12', '12-14', '14-16']
+
+
+def random_instance(n_lectures, n_instructors, n_rooms, n_timeslots, seed):
+    """
+    Get the arguments of a Timetable. Every lecture can be given by almost
+    half of the instructors and rooms, which are available at random days
+    and times, and every instructor can give two lectures.
+    """
+    rng = random.Random(seed)
+    timeslot_list = ['%s %s' % (day, time) for time in TIMES for day in DAYS][:n_timeslots]
+    lecture_list = ['Lecture %d' % (i + 1) for i in range(n_lectures)]
+
+    def resources(prefix, n_resources):
+        qualified = [[] for _ in range(n_resources)]
+        for lecture in lecture_list:
+            chosen = [i for i in range(n_resources) if rng.random() < 0.45]
+            for i in chosen or [rng.randrange(n_resources)]:
+                qualified[i].append(lecture)
+        return [[prefix % (i + 1), lectures,
+                 [day for day in DAYS if rng.random() < 0.85] or [rng.choice(DAYS)],
+                 [time for time in TIMES if rng.random() < 0.85] or [rng.choice(TIMES)]]
+                for i, lectures in enumerate(qualified)]
+
+    return (lecture_list, resources('Instructor %d', n_instructors),
+            resources('Room %d', n_rooms), timeslot_list, 2)
+
+
+def small_instances(n_seeds=6):
+    """Get pairs of a name and the arguments of a Timetable."""
+    return [('%d-%d-%d-%d-seed%d' % (size + (seed,)), random_instance(*size, seed=seed))
+            for size in SMALL_SIZES for seed in range(n_seeds)]
+
+
+def options(lecture_list, instructor_list, room_list, timeslot_list):
+    """
+    Get the (instructor name, room number, timeslot) triples that each
+    lecture could use on its own.
+    """
+    def available(spec):
+        days = spec[2] or DAYS
+        times = spec[3] or DEFAULT_TIMES
+        return {'%s %s' % (day, time) for day in days for time in times}
+
+    result = {}
+    for lecture in lecture_list:
+        result[lecture] = [(instructor[0], room[0], timeslot)
+                           for instructor in instructor_list if lecture in instructor[1]
+                           for room in room_list if lecture in room[1]
+                           for timeslot in timeslot_list
+                           if timeslot in available(instructor) and timeslot in available(room)]
+    return result
+
+
+def count_schedules(lecture_list, instructor_list, room_list, timeslot_list,
+                    max_lectures_per_instructor):
+    """Count the schedules of a timetable by trying every combination."""
+    lectures = list(lecture_list)
+    choices = options(lectures, instructor_list, room_list, timeslot_list)
+    used = set()
+    loads = {}
+
+    def count(position):
+        if position == len(lectures):
+            return 1
+        n_schedules = 0
+        for instructor, room, timeslot in choices[lectures[position]]:
+            if (('instructor', instructor, timeslot) in used or
+                    ('room', room, timeslot) in used or
+                    loads.get(instructor, 0) >= max_lectures_per_instructor):
+                continue
+            used.update({('instructor', instructor, timeslot), ('room', room, timeslot)})
+            loads[instructor] = loads.get(instructor, 0) + 1
+            n_schedules += count(position + 1)
+            used.difference_update({('instructor', instructor, timeslot),
+                                    ('room', room, timeslot)})
+            loads[instructor] -= 1
+        return n_schedules
+
+    return count(0)
+
+
+def is_valid(schedule, lecture_list, instructor_list, room_list, timeslot_list,
+             max_lectures_per_instructor):
+    """Check a schedule of a timetable without the help of the scheduler."""
+    choices = options(lecture_list, instructor_list, room_list, timeslot_list)
+    if set(schedule) != set(lecture_list):
+        return False
+    used = set()
+    loads = {}
+    for lecture, assignment in schedule.items():
+        instructor = str(assignment.instructor)
+        room = assignment.room.number
+        timeslot = str(assignment.timeslot)
+        if (instructor, room, timeslot) not in choices[lecture]:
+            return False
+        for resource in (('instructor', instructor), ('room', room)):
+            if resource + (timeslot,) in used:
+                return False
+            used.add(resource + (timeslot,))
+        loads[instructor] = loads.get(instructor, 0) + 1
+        if loads[instructor] > max_lectures_per_instructor:
+            return False
+    return True
@@ -0,0 +1,56 @@
+"""
+The instance generator and the benchmark runner.
+"""
+from scheduler.generator import generate_instance
+from scheduler.benchmark import (benchmark_instances, run_benchmark, save_results,
+                                 compare_results)
+
+
+def test_generator_is_deterministic_for_a_seed():
+    assert generate_instance(30, 8, 5, 20, seed=1) == generate_instance(30, 8, 5, 20, seed=1)
+    assert generate_instance(30, 8, 5, 20, seed=1) != generate_instance(30, 8, 5, 20, seed=2)
+
+
+def test_generator_qualifies_everybody_for_some_lecture():
+    lecture_list, instructor_list, room_list, timeslot_list, max_lectures = \
+        generate_instance(30, 8, 5, 20, qualification_density=0, seed=3)
+    assert (len(lecture_list), len(instructor_list), len(room_list), len(timeslot_list)) == \
+        (30, 8, 5, 20)
+    assert len(set(timeslot_list)) == 20
+    assert max_lectures == 6
+    for resources in (instructor_list, room_list):
+        # Without qualifications every lecture gets exactly one of each.
+        assert sorted(lecture for resource in resources for lecture in resource[1]) == \
+            sorted(lecture_list)
+        for name, lectures, days, times in resources:
+            assert days and times
+
+
+def test_structured_instances_stay_within_departments():
+    lecture_list, instructor_list, room_list, _, _ = \
+        generate_instance(30, 6, 6, 20, qualification_density=1, n_groups=3, seed=4)
+    for resources in (instructor_list, room_list):
+        for i, (name, lectures, days, times) in enumerate(resources):
+            assert lectures == lecture_list[10 * (i // 2):10 * (i // 2 + 1)]
+
+
+def test_benchmark_runs_and_compares_tiny_instances(tmp_path):
+    instances = benchmark_instances([8, 12], repeat=2)
+    assert [instance['name'] for instance in instances] == \
+        ['random-8-0', 'random-8-1', 'random-12-0', 'random-12-1']
+
+    results = run_benchmark(instances, dict(timeout=10))
+    for instance, result in zip(instances, results):
+        assert result['name'] == instance['name']
+        assert result['stop_reason'] in ('solved', 'infeasible')
+        n_lectures = instance['parameters']['n_lectures']
+        if result['stop_reason'] == 'solved':
+            assert result['n_assigned'] == n_lectures
+        assert result['solve_time'] < 10
+
+    old, new = str(tmp_path / 'old.json'), str(tmp_path / 'new.json')
+    save_results(results, old)
+    save_results(results, new)
+    table = compare_results(old, new).splitlines()
+    assert len(table) == 2 + len(instances)
+    assert table[-1].startswith('Geometric mean speedup over 4 finished instances: 1.00')
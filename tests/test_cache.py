@@ -0,0 +1,117 @@
+"""
+The loaders and the solution cache.
+"""
+import csv
+import json
+from scheduler import Timetable, SolutionCache, ScheduleChange, load_json, load_csv
+from scheduler.cache import spec_hash
+from instances import small_instances, count_schedules
+
+
+FEASIBLE = [(name, spec) for name, spec in small_instances(n_seeds=4)
+            if count_schedules(*spec)]
+
+
+def test_cache_returns_the_stored_schedule(tmp_path):
+    cache = SolutionCache(str(tmp_path))
+    for name, spec in FEASIBLE[:6]:
+        schedule = cache.find_schedule(Timetable(*spec))
+        timetable = Timetable(*spec)
+        assert cache.load(timetable) == schedule
+        assert cache.find_schedule(timetable) == schedule
+        assert timetable.stop_reason == 'solved'
+
+
+def test_cache_searches_again_for_broken_files(tmp_path):
+    cache = SolutionCache(str(tmp_path))
+    name, spec = FEASIBLE[-1]
+    timetable = Timetable(*spec)
+    schedule = cache.find_schedule(timetable)
+    path = tmp_path / (spec_hash(timetable) + '.json')
+
+    for content in ('{"schedule": [', '{"schedule": [[1, 2]]}', '{"rows": []}'):
+        path.write_text(content, encoding='utf-8')
+        assert cache.load(timetable) is None
+        assert cache.find_schedule(Timetable(*spec)) == schedule
+
+    # A schedule that books every lecture in the same room at the same time.
+    assignment = schedule[spec[0][0]]
+    row = [str(assignment.instructor), assignment.room.number, str(assignment.timeslot)]
+    path.write_text(json.dumps({'schedule': [[lecture] + row for lecture in spec[0]]}),
+                    encoding='utf-8')
+    assert cache.load(timetable) is None
+    assert cache.find_schedule(Timetable(*spec)) == schedule
+
+
+def test_spec_hash_ignores_the_order_of_the_specification():
+    name, spec = FEASIBLE[-1]
+    lectures, instructors, rooms, timeslots, max_lectures = spec
+    reordered = Timetable(lectures[::-1],
+                          [[name, lectures[::-1], days[::-1], times]
+                           for name, lectures, days, times in instructors[::-1]],
+                          rooms[::-1], timeslots[::-1], max_lectures)
+    assert spec_hash(reordered) == spec_hash(Timetable(*spec))
+    assert spec_hash(Timetable(*spec[:4], max_lectures + 1)) != spec_hash(Timetable(*spec))
+
+
+def test_load_json_reads_objects_and_lists(tmp_path):
+    for name, spec in FEASIBLE[:3]:
+        lectures, instructors, rooms, timeslots, max_lectures = spec
+        keys = ('name', 'lectures', 'days', 'times')
+        objects = {'lecture_list': lectures,
+                   'instructor_list': [dict(zip(keys, instructor)) for instructor in instructors],
+                   'room_list': [dict(zip(('number',) + keys[1:], room)) for room in rooms],
+                   'timeslot_list': timeslots,
+                   'max_lectures_per_instructor': max_lectures}
+        lists = dict(objects, instructor_list=instructors, room_list=rooms)
+        expected = Timetable(*spec).canonical_spec()
+        for i, content in enumerate((objects, lists)):
+            path = tmp_path / ('%s-%d.json' % (name, i))
+            path.write_text(json.dumps(content), encoding='utf-8')
+            assert load_json(str(path)).canonical_spec() == expected
+        assert load_json(str(path), max_lectures_per_instructor=max_lectures + 1) \
+            .canonical_spec()['max_lectures_per_instructor'] == max_lectures + 1
+
+
+def test_load_csv_reads_lists_and_room_numbers(tmp_path):
+    name, spec = FEASIBLE[-1]
+    lectures, instructors, rooms, timeslots, max_lectures = spec
+    # Rooms numbered by integers, which are written as digits.
+    rooms = [[i + 1] + room[1:] for i, room in enumerate(rooms)]
+
+    def write(filename, header, rows):
+        with open(str(tmp_path / filename), 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            writer.writerows(rows)
+        return str(tmp_path / filename)
+
+    def resource_rows(resources):
+        return [[key] + [';'.join(items) for items in resource]
+                for key, *resource in resources]
+
+    timetable = load_csv(write('lectures.csv', ['name'], [[lecture] for lecture in lectures]),
+                         write('instructors.csv', ['name', 'lectures', 'days', 'times'],
+                               resource_rows(instructors)),
+                         write('rooms.csv', ['number', 'lectures', 'days', 'times'],
+                               resource_rows(rooms)),
+                         write('timeslots.csv', ['timeslot'],
+                               [[timeslot] for timeslot in timeslots]),
+                         max_lectures)
+    expected = Timetable(lectures, instructors, rooms, timeslots, max_lectures)
+    assert timetable.canonical_spec() == expected.canonical_spec()
+    assert all(isinstance(room.number, int) for room in timetable._rooms)
+    assert timetable.check_schedule(expected.find_schedule())
+
+
+def test_lectures_of_different_types_can_be_cached(tmp_path):
+    lectures = ['Logic', 1, 'Physics', 2]
+    spec = (lectures, [['Smith', lectures, [], []]], [[1, lectures, [], []]],
+            ['Mon 10-12', 'Tue 10-12', 'Wed 10-12', 'Thu 10-12', 'Fri 10-12'], 4)
+    timetable = Timetable(*spec)
+    assert spec_hash(timetable) == spec_hash(Timetable(lectures[::-1], *spec[1:]))
+    cache = SolutionCache(str(tmp_path))
+    schedule = cache.find_schedule(timetable)
+    assert cache.load(Timetable(*spec)) == schedule
+    repaired = timetable.repair(ScheduleChange(remove_timeslots=['Fri 10-12']))
+    assert set(repaired.schedule) == set(lectures)
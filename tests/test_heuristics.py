@@ -0,0 +1,47 @@
+"""
+The lecture selection of the search.
+"""
+import random
+import pytest
+from scheduler import Timetable, SearchOptions
+from scheduler.exceptions import ImpossibleAssignments
+from scheduler.generator import generate_instance
+from scheduler.heuristics import LectureQueue
+from scheduler.helper import count_bits, iter_bits
+from scheduler.state import SearchState
+
+
+def test_lecture_queue_breaks_ties_by_the_lowest_lecture():
+    model = Timetable(*generate_instance(30, 8, 6, 20, seed=0))._model
+    state = SearchState(model)
+    queue = LectureQueue(state)
+    degrees = model.degrees()
+    rng = random.Random(0)
+    for _ in range(20):
+        expected = min(state.unassigned(), key=lambda lecture: (
+            count_bits(state.domains[lecture]), -degrees[lecture], lecture))
+        assert queue.select(state) == expected
+        state.mark()
+        lecture = rng.choice(list(state.unassigned()))
+        domain = state.domains[lecture]
+        if rng.random() < 0.5 and count_bits(domain) > 1:
+            state.set_domain(lecture, domain & (domain - 1))
+        else:
+            state.assign(lecture, rng.choice(list(iter_bits(domain))))
+        if rng.random() < 0.3:
+            state.undo()
+
+
+@pytest.mark.parametrize('seed', range(20, 30))
+def test_batched_and_trial_lcv_find_the_same_schedule(seed):
+    spec = generate_instance(20, 5, 4, 10, seed=seed)
+    schedules = []
+    for lcv in ('batched', 'trial'):
+        try:
+            # Without backjumping there are no nogoods, which only the trial uses.
+            options = SearchOptions(lcv=lcv, backjumping=False)
+            schedule = Timetable(*spec).find_schedule(options, node_limit=5000)
+            schedules.append(dict(schedule))
+        except ImpossibleAssignments:
+            schedules.append(None)
+    assert schedules[0] == schedules[1]
@@ -0,0 +1,57 @@
+"""
+The compiled model compared with a naive construction that checks every
+combination of a lecture, an instructor, a room and a timeslot.
+"""
+import pytest
+from scheduler import Timetable
+from scheduler.generator import generate_instance
+from instances import small_instances
+
+
+INSTANCES = small_instances(n_seeds=2) + [
+    ('generated', generate_instance(40, 8, 6, 20, seed=0)),
+    ('structured', generate_instance(40, 8, 6, 20, n_groups=2, seed=1))]
+
+
+def naive_domains(timetable):
+    """Get the usable assignments of each lecture as sets of triples."""
+    return [{(instructor, room, timeslot)
+             for instructor in timetable._instructors if instructor.can_teach(lecture)
+             for room in timetable._rooms if room.can_be_used_for(lecture)
+             for timeslot in timetable._timeslots
+             if instructor.can_teach_at(timeslot) and room.can_be_used_at(timeslot)}
+            for lecture in timetable._lectures]
+
+
+def triples(model, mask):
+    return {(model.assignments[index].instructor, model.assignments[index].room,
+             model.assignments[index].timeslot)
+            for index in range(model.n_assignments) if mask >> index & 1}
+
+
+@pytest.mark.parametrize('name, spec', INSTANCES, ids=[name for name, _ in INSTANCES])
+def test_domains_match_the_naive_construction(name, spec):
+    timetable = Timetable(*spec)
+    model = timetable._model
+    assert [triples(model, domain) for domain in model.domains] == naive_domains(timetable)
+    # No assignment is compiled twice.
+    assert len(triples(model, (1 << model.n_assignments) - 1)) == model.n_assignments
+
+
+@pytest.mark.parametrize('name, spec', INSTANCES, ids=[name for name, _ in INSTANCES])
+def test_conflicts_match_the_naive_construction(name, spec):
+    model = Timetable(*spec)._model
+    for index, assignment in enumerate(model.assignments):
+        conflicts = 0
+        for other_index, other in enumerate(model.assignments):
+            if (assignment.overlaps_instructor_at_time(other) or
+                    assignment.overlaps_room_at_time(other)):
+                conflicts |= 1 << other_index
+        assert model.conflict_mask(index) == conflicts
+        assert set(model.conflicting_lectures(index)) == set(model.lectures_using(conflicts))
+
+    for masks in (model.instructor_masks, model.room_masks,
+                  model.instructor_time_masks, model.room_time_masks):
+        index = model.lecture_index(masks)
+        assert {key: set(lectures) for key, lectures in index.items()} == \
+            {key: set(model.lectures_using(mask)) for key, mask in masks.items()}
@@ -0,0 +1,55 @@
+"""
+Repairs of schedules on small random instances, compared with a brute-force
+solver.
+"""
+import pytest
+from scheduler import Timetable, ScheduleChange
+from scheduler.exceptions import ImpossibleAssignments
+from instances import small_instances, count_schedules, is_valid
+
+
+FEASIBLE = [(name, spec) for name, spec in small_instances(n_seeds=4)
+            if count_schedules(*spec)]
+IDS = [name for name, _ in FEASIBLE]
+
+
+def changes(timetable, spec):
+    """Changes that take away the assignment of a scheduled lecture."""
+    schedule = timetable.find_schedule()
+    lecture = spec[0][0]
+    assignment = schedule[lecture]
+    instructors = [instructor for instructor in spec[1]
+                   if instructor[0] == str(assignment.instructor)]
+    days = [day for day in instructors[0][2] if day != assignment.timeslot.day] or ['Mon']
+    return [
+        ScheduleChange(remove_timeslots=[str(assignment.timeslot)]),
+        ScheduleChange(instructors=[instructors[0][:2] + [days, instructors[0][3]]]),
+        ScheduleChange(add_lectures=['Lecture new'],
+                       rooms=[[assignment.room.number, spec[2][0][1] + ['Lecture new'],
+                               [], []]]),
+        ScheduleChange(remove_lectures=[lecture]),
+    ]
+
+
+@pytest.mark.parametrize('model', ['product', 'factorized'])
+@pytest.mark.parametrize('name, spec', FEASIBLE, ids=IDS)
+def test_repair_agrees_with_brute_force(name, spec, model):
+    timetable = Timetable(*spec, model=model)
+    for change in changes(timetable, spec):
+        changed = list(change.apply(*spec[:4])) + [spec[4]]
+        if count_schedules(*changed):
+            repaired = timetable.repair(change)
+            assert repaired.stop_reason == 'solved', (name, change)
+            assert repaired.check_schedule(repaired._schedule), (name, change)
+            assert is_valid(repaired._schedule, *changed), (name, change)
+        else:
+            with pytest.raises(ImpossibleAssignments):
+                timetable.repair(change)
+
+
+def test_repair_keeps_unaffected_lectures():
+    name, spec = FEASIBLE[-1]
+    timetable = Timetable(*spec)
+    schedule = timetable.find_schedule()
+    repaired = timetable.repair(ScheduleChange(add_timeslots=['Sat 8-10']))
+    assert dict(repaired._schedule) == dict(schedule)
@@ -0,0 +1,73 @@
+"""
+Selecting, sorting and exporting a Schedule.
+"""
+import sys
+from scheduler import Timeslot, Instructor, Room, Assignment, Schedule
+
+
+def example():
+    """Three lectures of two instructors in two rooms."""
+    monday, tuesday = Timeslot('Mon', '8', '10'), Timeslot('Tue', '10', '12')
+    afternoon = Timeslot('Mon', '14', '16')
+    timeslots = [monday, tuesday, afternoon]
+    smith = Instructor('Smith', ['Logic', 'Algebra'], timeslots)
+    jones = Instructor('Jones', ['Physics'], timeslots)
+    small, large = Room(1, ['Logic', 'Physics'], timeslots), Room(2, ['Algebra'], timeslots)
+    return Schedule([('Logic', Assignment(smith, small, tuesday)),
+                     ('Physics', Assignment(jones, small, afternoon)),
+                     ('Algebra', Assignment(smith, large, monday))])
+
+
+def test_schedule_is_a_mapping():
+    schedule = example()
+    pairs = dict(schedule.items())
+    assert len(schedule) == len(schedule.items()) == len(schedule.values()) == 3
+    # The views can be iterated more than once.
+    assert list(schedule.items()) == list(schedule.items()) == list(pairs.items())
+    assert list(schedule.values()) == list(pairs.values())
+    assert schedule.items() == pairs.items()
+    assert ('Logic', pairs['Logic']) in schedule.items()
+    assert schedule == pairs and Schedule(pairs) == schedule
+    assert schedule['Physics'].room.number == 1
+
+
+def test_schedule_selects_lectures_by_value_or_identifier():
+    schedule = example()
+    smith = schedule['Logic'].instructor
+    assert list(schedule.given_by('Smith')) == ['Logic', 'Algebra']
+    assert schedule.given_by(smith) == schedule.given_by('Smith')
+    assert list(schedule.in_room(1)) == ['Logic', 'Physics']
+    assert list(schedule.in_room(schedule['Algebra'].room)) == ['Algebra']
+    assert list(schedule.at('Mon 14-16')) == ['Physics']
+    assert list(schedule.at(Timeslot('Tue', '10', '12'))) == ['Logic']
+    assert len(schedule.at('Sat 8-10')) == 0
+    assert list(schedule.given_by('Jones').in_room(1)) == ['Physics']
+
+
+def test_schedule_sorts_and_exports_its_rows(monkeypatch):
+    schedule = example()
+    # Times are sorted by day and start, not by their text.
+    assert [lecture for lecture, _ in schedule.sorted()] == ['Algebra', 'Physics', 'Logic']
+    assert [lecture for lecture, _ in schedule.sorted('lecture')] == \
+        ['Algebra', 'Logic', 'Physics']
+    assert [lecture for lecture, _ in schedule.sorted('instructor')] == \
+        ['Physics', 'Logic', 'Algebra']
+    assert [lecture for lecture, _ in schedule.sorted('room')] == \
+        ['Logic', 'Physics', 'Algebra']
+
+    frame = schedule.to_dataframe()
+    assert list(frame.columns) == ['Lecture', 'Time', 'Instructor', 'Room']
+    assert frame.values.tolist() == [['Algebra', 'Mon 8-10', 'Smith', 'No.2'],
+                                     ['Physics', 'Mon 14-16', 'Jones', 'No.1'],
+                                     ['Logic', 'Tue 10-12', 'Smith', 'No.1']]
+
+    table = schedule.to_table(by='lecture')
+    assert 'Lecture' in table and table.index('Algebra') < table.index('Physics')
+    # Without prettytable the rows are printed in plain columns.
+    monkeypatch.setitem(sys.modules, 'prettytable', None)
+    assert schedule.to_table(by='lecture').splitlines() == [
+        'Lecture  Time       Instructor  Room',
+        '-------  ---------  ----------  ----',
+        'Algebra  Mon 8-10   Smith       No.2',
+        'Logic    Tue 10-12  Smith       No.1',
+        'Physics  Mon 14-16  Jones       No.1']
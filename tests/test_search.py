@@ -0,0 +1,197 @@
+"""
+The searches of a Timetable compared with a brute-force solver on small
+random instances.
+"""
+import pytest
+from scheduler import Timetable, SearchOptions
+from scheduler.exceptions import ImpossibleAssignments
+from scheduler.state import SearchState
+from scheduler.transposition import TranspositionTable
+from instances import small_instances, count_schedules, is_valid
+
+
+INSTANCES = small_instances()
+IDS = [name for name, _ in INSTANCES]
+# The number of schedules of each instance, counted once for all tests.
+COUNTS = {name: count_schedules(*spec) for name, spec in INSTANCES}
+# The instances whose schedules are few enough to be counted one by one.
+COUNTABLE = [(name, spec) for name, spec in INSTANCES if COUNTS[name] <= 10000]
+
+# Keyword arguments of the Timetable and of its SearchOptions. The global
+# constraints decide most small instances without any search, so the
+# features of the search are mostly tested without them.
+SEARCH = dict(global_constraints=False)
+CONFIGURATIONS = [
+    ({}, {}),
+    ({}, dict(lcv='trial')),
+    ({}, dict(decompose=True, lcv='trial')),
+    (SEARCH, {}),
+    (SEARCH, dict(backjumping=False)),
+    (SEARCH, dict(restarts='luby', seed=1, restart_scale=1)),
+    (SEARCH, dict(restarts='geometric', seed=2, restart_scale=1, backjumping=False)),
+    (SEARCH, dict(lcv='trial')),
+    (SEARCH, dict(table_size=64)),
+    (SEARCH, dict(table_size=64, backjumping=False, break_symmetries=False)),
+    (SEARCH, dict(table_size=64, restarts='luby', seed=3, restart_scale=1)),
+    (SEARCH, dict(break_symmetries=False)),
+    (SEARCH, dict(backjumping=False, break_symmetries=False)),
+    (SEARCH, dict(decompose=True)),
+    (dict(model='factorized'), {}),
+    (dict(SEARCH, model='factorized'), {}),
+    (dict(SEARCH, model='factorized'), dict(backjumping=False, decompose=True)),
+    (dict(SEARCH, model='factorized'), dict(restarts='luby', seed=4, restart_scale=1,
+                                            table_size=64)),
+]
+CONFIGURATION_IDS = ['-'.join('%s=%s' % item for item in sorted({**timetable, **search}.items()))
+                     or 'default' for timetable, search in CONFIGURATIONS]
+
+
+@pytest.mark.parametrize('model', ['product', 'factorized'])
+@pytest.mark.parametrize('name, spec', COUNTABLE, ids=[name for name, _ in COUNTABLE])
+def test_count_schedules_matches_brute_force(name, spec, model):
+    timetable = Timetable(*spec, model=model)
+    assert timetable.count_schedules() == COUNTS[name]
+    assert timetable.stop_reason == ('solved' if COUNTS[name] else 'infeasible')
+
+
+@pytest.mark.parametrize('model', ['product', 'factorized'])
+@pytest.mark.parametrize('name, spec', INSTANCES[:12], ids=IDS[:12])
+def test_iter_schedules_yields_distinct_valid_schedules(name, spec, model):
+    timetable = Timetable(*spec, model=model)
+    schedules = set()
+    for schedule in timetable.iter_schedules():
+        assert is_valid(schedule, *spec)
+        schedules.add(frozenset(schedule.items()))
+    assert len(schedules) == COUNTS[name]
+
+
+@pytest.mark.parametrize('timetable_options, search_options', CONFIGURATIONS,
+                         ids=CONFIGURATION_IDS)
+def test_find_schedule_agrees_with_brute_force(timetable_options, search_options):
+    for name, spec in INSTANCES:
+        timetable = Timetable(*spec, **timetable_options)
+        if COUNTS[name]:
+            schedule = timetable.find_schedule(SearchOptions(**search_options))
+            assert timetable.stop_reason == 'solved', name
+            assert is_valid(schedule, *spec), name
+            assert timetable.check_schedule(schedule), name
+        else:
+            with pytest.raises(ImpossibleAssignments):
+                timetable.find_schedule(SearchOptions(**search_options))
+            assert timetable.stop_reason == 'infeasible', name
+
+
+def test_portfolio_and_parallel_components_agree_with_brute_force():
+    for name, spec in INSTANCES[::3]:
+        for options in (SearchOptions(workers=2), SearchOptions(workers=2, decompose=True)):
+            timetable = Timetable(*spec)
+            if COUNTS[name]:
+                schedule = timetable.find_schedule(options)
+                assert is_valid(schedule, *spec), name
+                assert timetable.check_schedule(schedule), name
+            else:
+                with pytest.raises(ImpossibleAssignments):
+                    timetable.find_schedule(options)
+
+
+def test_search_options_are_checked_and_replaced():
+    for options in (dict(lcv='greedy'), dict(workers=0), dict(method='tabu')):
+        with pytest.raises(ValueError):
+            SearchOptions(**options)
+    options = SearchOptions(restarts='luby', seed=1)
+    assert vars(options.replace(lcv='trial')) == dict(vars(options), lcv='trial')
+    assert options.lcv == 'batched'
+
+
+def test_check_schedule_rejects_broken_schedules():
+    name, spec = max(INSTANCES, key=lambda instance: COUNTS[instance[0]])
+    timetable = Timetable(*spec)
+    schedule = dict(timetable.find_schedule())
+    assert timetable.check_schedule(schedule)
+    lectures = list(schedule)
+    # A missing lecture, an unknown lecture and two lectures at once.
+    assert not timetable.check_schedule({lecture: schedule[lecture] for lecture in lectures[1:]})
+    assert not timetable.check_schedule(dict(schedule, unknown=schedule[lectures[0]]))
+    assert not timetable.check_schedule(dict(schedule, **{lectures[1]: schedule[lectures[0]]}))
+    # A schedule of a timetable without the first timeslot.
+    other = Timetable(spec[0], spec[1], spec[2], spec[3][1:], spec[4])
+    used = {str(assignment.timeslot) for assignment in schedule.values()}
+    assert other.check_schedule(schedule) == (spec[3][0] not in used)
+
+
+def test_budget_stops_with_a_consistent_partial_schedule():
+    # A search that needs nodes and whose partial schedules cannot be
+    # completed greedily.
+    spec = dict(INSTANCES)['6-3-3-8-seed5']
+    for limit, reason in ((dict(node_limit=1), 'node_limit'), (dict(timeout=0), 'timeout'),
+                          (dict(memory_limit=1), 'memory_limit')):
+        timetable = Timetable(*spec, **SEARCH)
+        schedule = timetable.find_schedule(**limit)
+        assert timetable.stop_reason == reason
+        assert str(timetable).startswith('Partial schedule (%s)' % reason)
+        assert 0 < len(schedule) < len(spec[0])
+        used = set()
+        for assignment in schedule.values():
+            for key in ((assignment.instructor, assignment.timeslot),
+                        (assignment.room, assignment.timeslot)):
+                assert key not in used
+                used.add(key)
+
+
+def test_budget_stop_reports_schedules_completed_greedily():
+    name, spec = max(INSTANCES, key=lambda instance: COUNTS[instance[0]])
+    for limit in (dict(node_limit=0), dict(timeout=0), dict(memory_limit=1)):
+        timetable = Timetable(*spec)
+        schedule = timetable.find_schedule(**limit)
+        assert timetable.stop_reason == 'solved'
+        assert not str(timetable).startswith('Partial schedule')
+        assert is_valid(schedule, *spec)
+
+
+def test_local_search_finds_valid_schedules():
+    for name, spec in INSTANCES:
+        if not COUNTS[name]:
+            continue
+        timetable = Timetable(*spec)
+        schedule = timetable.find_schedule(SearchOptions(method='local', seed=0),
+                                           node_limit=20000)
+        if timetable.stop_reason == 'solved':
+            assert is_valid(schedule, *spec), name
+        else:
+            assert timetable.stop_reason == 'node_limit', name
+    with pytest.raises(ValueError):
+        Timetable(*spec).find_schedule(SearchOptions(method='local'))
+
+
+def test_transposition_table_follows_the_state():
+    name, spec = INSTANCES[-1]
+    state = SearchState(Timetable(*spec)._model)
+    table = TranspositionTable(state, max_size=2)
+    assert not table.is_refuted()
+
+    state.mark()
+    lecture = max(range(len(state.domains)), key=lambda lecture: state.domains[lecture])
+    index = state.domains[lecture].bit_length() - 1
+    state.assign(lecture, index)
+    table.add()
+    state.undo()
+    assert not table.is_refuted()
+    # The same state reached again.
+    state.mark()
+    state.assign(lecture, index)
+    assert table.is_refuted()
+    assert (table.n_hits, table.n_misses) == (1, 2)
+    state.undo()
+
+    # Only the most recently used states are kept.
+    for _ in range(2):
+        state.mark()
+        state.set_domain(lecture, state.domains[lecture] & ~(1 << index))
+        table.add()
+        index = state.domains[lecture].bit_length() - 1
+    state.undo()
+    state.undo()
+    state.mark()
+    state.assign(lecture, state.domains[lecture].bit_length() - 1)
+    assert not table.is_refuted()
+    assert len(table) == 2
@@ -0,0 +1,86 @@
+"""
+The statistics of a search and the events its observers receive.
+"""
+import io
+import pytest
+from scheduler import Timetable, SearchOptions, SearchObserver, PrintingObserver
+from scheduler.exceptions import ImpossibleAssignments
+from instances import random_instance
+
+
+# A solvable instance and one that is only refuted after some backtracking.
+SOLVED = random_instance(6, 3, 3, 8, seed=5)
+INFEASIBLE = random_instance(6, 3, 3, 8, seed=3)
+
+
+class RecordingObserver(SearchObserver):
+    """Keep the names of all events in the order they arrive."""
+    def __init__(self):
+        self.events = []
+
+    def on_start(self, stats):
+        self.events.append('start')
+
+    def on_node(self, state, stats):
+        self.events.append('node')
+
+    def on_failure(self, error, stats):
+        self.events.append('failure')
+
+    def on_restart(self, stats):
+        self.events.append('restart')
+
+    def on_finish(self, stop_reason, stats):
+        self.events.append(stop_reason)
+
+
+@pytest.mark.parametrize('options', [{}, dict(backjumping=False),
+                                     dict(restarts='luby', seed=1, restart_scale=1)],
+                         ids=['default', 'chronological', 'restarts'])
+def test_observers_receive_every_counted_event(options):
+    timetable = Timetable(*INFEASIBLE, global_constraints=False)
+    observer = RecordingObserver()
+    timetable.add_observer(observer)
+    with pytest.raises(ImpossibleAssignments):
+        timetable.find_schedule(SearchOptions(**options))
+
+    stats = timetable.stats
+    assert observer.events[0] == 'start'
+    assert observer.events[-1] == 'infeasible'
+    assert observer.events.count('node') == stats.n_nodes > 0
+    assert observer.events.count('failure') == stats.n_backtracks > 0
+    assert observer.events.count('restart') == stats.n_restarts
+    assert (stats.n_restarts > 0) == ('restarts' in options)
+    assert stats.n_wipeouts <= stats.n_backtracks
+
+
+def test_counters_of_a_solved_search():
+    timetable = Timetable(*SOLVED, global_constraints=False)
+    observer = RecordingObserver()
+    timetable.add_observer(observer)
+    timetable.find_schedule()
+
+    stats = timetable.stats.as_dict()
+    assert observer.events[-1] == 'solved'
+    assert observer.events.count('node') == stats['n_nodes'] > 0
+    # Only counted when profiling.
+    assert stats['n_propagations'] == stats['n_pruned'] == 0
+    assert set(stats['times']) >= {'compile', 'search'}
+
+
+def test_profiling_measures_propagation():
+    timetable = Timetable(*INFEASIBLE)
+    with pytest.raises(ImpossibleAssignments):
+        timetable.find_schedule(profile=True)
+    assert timetable.stats.n_propagations > 0
+    assert timetable.stats.times['propagation'] > 0
+
+
+def test_printing_observer_reports_the_end_of_the_search():
+    output = io.StringIO()
+    timetable = Timetable(*SOLVED, global_constraints=False)
+    timetable.add_observer(PrintingObserver(interval=0, file=output))
+    timetable.find_schedule()
+    lines = output.getvalue().splitlines()
+    assert len(lines) == timetable.stats.n_nodes + 1
+    assert lines[-1].startswith('Stopped after') and '(solved)' in lines[-1]
@@ -0,0 +1,82 @@
+"""
+The immutable value types and their interning.
+"""
+import pickle
+import pytest
+from scheduler import Timetable, Timeslot, Instructor, Room, Assignment
+from scheduler.registry import ValueRegistry
+from instances import random_instance
+
+
+def test_values_with_the_same_text_stay_distinct():
+    # The baseline hashed the concatenation of the parts of a timeslot.
+    first, second = Timeslot('Mon', '1', '012'), Timeslot('Mon', '10', '12')
+    assert first != second
+    assert hash(first) != hash(second)
+    assert len({first, second}) == 2
+    assert Timeslot('Mon', '10', '12') == second
+    assert hash(Timeslot('Mon', '10', '12')) == hash(second)
+
+    instructor = Instructor('Smith', ['A'], [first])
+    room = Room('Smith', ['A'], [first])
+    assert instructor != room
+    assert Assignment(instructor, room, first) != Assignment(instructor, room, second)
+    assert Assignment(instructor, room, first) == Assignment(instructor, room,
+                                                             Timeslot('Mon', '1', '012'))
+
+
+def test_values_are_immutable():
+    timeslot = Timeslot('Mon', '8', '10')
+    with pytest.raises(AttributeError):
+        timeslot.day = 'Tue'
+    with pytest.raises(AttributeError):
+        del timeslot._key
+    instructor = Instructor('Smith', ['A'], [timeslot])
+    with pytest.raises(AttributeError):
+        instructor.lectures.add('B')
+
+
+def test_registry_interns_equal_values():
+    registry = ValueRegistry()
+    first = registry.intern(Timeslot('Mon', '8', '10'))
+    assert registry.intern(Timeslot('Mon', '8', '10')) is first
+    second = registry.intern(Timeslot('Tue', '8', '10'))
+    instructor = registry.intern(Instructor('Smith', ['A'], [first]))
+    # Values are numbered by their type.
+    assert (first.id, second.id, instructor.id) == (0, 1, 0)
+    assert Timeslot('Tue', '8', '10').id is None
+    assert Timeslot('Tue', '8', '10') in registry
+    assert len(registry) == 3
+
+    # A value of another registry is copied rather than renumbered.
+    other = ValueRegistry()
+    copied = other.intern(second)
+    assert copied is not second and copied == second
+    assert (copied.id, second.id) == (0, 1)
+
+
+def test_timetable_shares_interned_values():
+    timetable = Timetable(*random_instance(6, 3, 3, 8, seed=1))
+    timeslots = {timeslot: timeslot for timeslot in timetable._timeslots}
+    for assignment in timetable._model.assignments:
+        assert assignment.instructor in timetable._instructors
+        assert timeslots[assignment.timeslot] is assignment.timeslot
+    for instructor in timetable._instructors:
+        for timeslot in instructor.timeslots:
+            if timeslot in timeslots:
+                assert timeslots[timeslot] is timeslot
+
+
+def test_interned_values_survive_pickling():
+    timetable = Timetable(*random_instance(6, 3, 3, 8, seed=1))
+    assignments = timetable._model.assignments
+    copies = pickle.loads(pickle.dumps(assignments))
+    assert copies == assignments
+    assert [hash(copy) for copy in copies] == [hash(assignment) for assignment in assignments]
+    assert len(set(copies) | set(assignments)) == len(assignments)
+
+    # A pickled timetable keeps its values interned.
+    copy = pickle.loads(pickle.dumps(timetable))
+    for assignment in copy._model.assignments:
+        assert copy._registry.intern(assignment) is assignment
+        assert copy._registry.intern(assignment.timeslot) is assignment.timeslot